@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Shared ingestion of `dart analyze --format=machine` output.
+
+Each line is SEVERITY|TYPE|ERROR_CODE|FILE|LINE|COLUMN|LENGTH|MESSAGE, with
+'|' and '\\' escaped by a backslash inside fields. A file is parsed once into
+a columnar AnalyzerOutput (one array per field, severity/type/code/file
+interned into a shared string table) and saved as a binary cache next to the
+input, so extract_missing_contracts and classify_domain query the same parsed
+representation. Single-pass consumers (summarize_analyzer_machine) stream rows
+with iter_rows() instead and keep memory flat.
+
+The cache is a JSON header (stamp, string table, messages, column sizes)
+followed by the raw int columns; it is never unpickled, so a planted
+<input>.parsed file cannot run code.
+"""
+
+import json
+import os
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+CACHE_SUFFIX = '.parsed'
+# Bump when parsing or the cache layout changes so stale caches are rebuilt.
+CACHE_VERSION = 2
+
+FIELDS = ('severity', 'type', 'code', 'file', 'line', 'column', 'length', 'message')
+
+def _split_escaped(line: str) -> List[str]:
+    """Split on unescaped '|' and drop the escaping backslashes."""
+    parts, field, chars = [], [], iter(line)
+    for ch in chars:
+        if ch == '\\':
+            field.append(next(chars, ''))
+        elif ch == '|':
+            parts.append(''.join(field))
+            field = []
+        else:
+            field.append(ch)
+    parts.append(''.join(field))
+    return parts
+
+def _int(value: str) -> int:
+    return int(value) if value.isdigit() else 0
+
+def parse_machine_line(line: str) -> Optional[Tuple[str, str, str, str, int, int, int, str]]:
+    """Parse one machine-format line into a tuple ordered like FIELDS, or None.
+
+    Older four-to-seven field reports (SEVERITY|TYPE|FILE|LINE|MESSAGE) are
+    still accepted; their TYPE doubles as the code.
+    """
+    line = line.rstrip('\r\n')
+    parts = _split_escaped(line) if '\\' in line else line.split('|')
+    if len(parts) >= 8:
+        severity, kind, code, file_path, line_num, column, length = parts[:7]
+        return (severity, kind, code, file_path, _int(line_num), _int(column), _int(length), '|'.join(parts[7:]))
+    if len(parts) >= 4:
+        severity, kind, file_path, line_num = parts[:4]
+        return (severity, kind, kind, file_path, _int(line_num), 0, 0, '|'.join(parts[4:]))
+    return None
+
+def iter_rows(lines: Iterable[str]) -> Iterator[Dict]:
+    """Rows parsed straight from lines, without building a columnar table."""
+    for line in lines:
+        if line.strip():
+            fields = parse_machine_line(line)
+            if fields:
+                yield dict(zip(FIELDS, fields))
+
+class AnalyzerOutput:
+    """Struct-of-arrays view of parsed analyzer output.
+
+    severity/type/code/file hold indices into ``strings``; line/column/length
+    are int arrays; messages are kept as a plain list.
+    """
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self.severity = array('I')
+        self.type = array('I')
+        self.code = array('I')
+        self.file = array('I')
+        self.line = array('i')
+        self.column = array('i')
+        self.length = array('i')
+        self.message: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.message)
+
+    def intern(self, value: str) -> int:
+        sid = self._string_ids.get(value)
+        if sid is None:
+            sid = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return sid
+
+    def string_id(self, value: str) -> Optional[int]:
+        """Index of value in the string table, or None if no row uses it."""
+        return self._string_ids.get(value)
+
+    def append(self, fields: Tuple[str, str, str, str, int, int, int, str]) -> None:
+        severity, kind, code, file_path, line_num, column, length, message = fields
+        self.severity.append(self.intern(severity))
+        self.type.append(self.intern(kind))
+        self.code.append(self.intern(code))
+        self.file.append(self.intern(file_path))
+        self.line.append(line_num)
+        self.column.append(column)
+        self.length.append(length)
+        self.message.append(message)
+
+    def row(self, i: int) -> Dict:
+        strings = self.strings
+        return {
+            'severity': strings[self.severity[i]],
+            'type': strings[self.type[i]],
+            'code': strings[self.code[i]],
+            'file': strings[self.file[i]],
+            'line': self.line[i],
+            'column': self.column[i],
+            'length': self.length[i],
+            'message': self.message[i]
+        }
+
+    def rows(self, indices: Optional[Iterable[int]] = None) -> Iterator[Dict]:
+        for i in range(len(self)) if indices is None else indices:
+            yield self.row(i)
+
+    def with_codes(self, codes: Iterable[str]) -> List[int]:
+        """Row indices whose error code is one of codes."""
+        wanted = {sid for sid in map(self.string_id, codes) if sid is not None}
+        return [i for i, sid in enumerate(self.code) if sid in wanted]
+
+    def _save(self, path: str, stamp: List) -> None:
+        columns = [getattr(self, name).tobytes() for name in FIELDS[:7]]
+        header = {
+            'stamp': stamp,
+            'byteorder': sys.byteorder,
+            'strings': self.strings,
+            'message': self.message,
+            'columns': [len(data) for data in columns]
+        }
+        with open(path, 'wb') as f:
+            f.write(json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n')
+            for data in columns:
+                f.write(data)
+
+    @classmethod
+    def _load_cache(cls, path: str, stamp: List) -> Optional['AnalyzerOutput']:
+        """Cached table if the cache at path was written for stamp, else None."""
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get('stamp') != stamp or header.get('byteorder') != sys.byteorder:
+                return None
+            output = cls()
+            output.strings = header['strings']
+            output._string_ids = {value: i for i, value in enumerate(output.strings)}
+            output.message = header['message']
+            for name, size in zip(FIELDS[:7], header['columns']):
+                column = getattr(output, name)
+                column.frombytes(f.read(size))
+                if len(column) != len(output.message):
+                    return None
+        return output
+
+def parse_lines(lines: Iterable[str]) -> AnalyzerOutput:
+    output = AnalyzerOutput()
+    for line in lines:
+        if line.strip():
+            fields = parse_machine_line(line)
+            if fields:
+                output.append(fields)
+    return output
+
+def load(path: str, use_cache: bool = True) -> AnalyzerOutput:
+    """Parse an analyzer machine-output file, reusing its binary cache when fresh.
+
+    '-' reads stdin (never cached). A missing file yields an empty result.
+    """
+    if path == '-':
+        sys.stdin.reconfigure(encoding='utf-8', errors='ignore')
+        return parse_lines(sys.stdin)
+    if not os.path.exists(path):
+        return AnalyzerOutput()
+
+    st = os.stat(path)
+    stamp = [CACHE_VERSION, st.st_size, st.st_mtime_ns]
+    cache_path = path + CACHE_SUFFIX
+    if use_cache:
+        try:
+            cached = AnalyzerOutput._load_cache(cache_path, stamp)
+            if cached is not None:
+                return cached
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            pass
+
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        output = parse_lines(f)
+
+    if use_cache:
+        try:
+            tmp_path = cache_path + '.tmp'
+            output._save(tmp_path, stamp)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # read-only location: parsing still succeeded
+    return output
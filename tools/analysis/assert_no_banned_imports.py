@@ -1,47 +1,83 @@
 #!/usr/bin/env python3
 
-import json, re, sys, pathlib, os
+import argparse, json, re, sys, pathlib, os
+
+from dart_index import DartIndex
+from git_scope import add_scope_arguments, changed_files, under
+from parallel_scan import add_jobs_argument
 
 ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 CLEAN_ROOT = pathlib.Path(
     os.environ.get("CLEAN_B_ROOT", str(ROOT))
 ).resolve()
-APP  = CLEAN_ROOT / "lib"
 
 CFG  = ROOT / "tools" / "reports" / "banned_import_patterns.json"
 
+class RuleSet:
+    """All patterns of one list compiled into a single alternation.
+
+    Each rule is wrapped in its own named group, so one ``match`` call both
+    decides whether any rule applies and reports which one fired first.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.rx = None
+        if self.patterns:
+            self.rx = re.compile("|".join(f"(?P<r{i}>{p})" for i, p in enumerate(self.patterns)))
+
+    def match(self, text):
+        """Return the first rule matching at the start of ``text``, or None."""
+        if self.rx is None:
+            return None
+        m = self.rx.match(text)
+        if m is None:
+            return None
+        return self.patterns[int(m.lastgroup[1:])]
+
 def main():
+    parser = argparse.ArgumentParser(description="Fail if app code imports banned packages")
+    parser.add_argument("target", nargs="?", default="lib", help="Directory under CLEAN_B_ROOT to scan (default: lib)")
+    add_jobs_argument(parser)
+    add_scope_arguments(parser)
+    args = parser.parse_args()
+    app = CLEAN_ROOT / args.target
+    changed = changed_files(str(CLEAN_ROOT), args.since, args.staged)
+
     config = json.loads(CFG.read_text(encoding="utf-8"))
-    allow_patterns = [re.compile(p) for p in config.get("allow", [])]
-    deny_patterns = [re.compile(p) for p in config.get("deny", [])]
+    allow = RuleSet(config.get("allow", []))
+    deny = RuleSet(config.get("deny", []))
 
     bad = []
-    for p in APP.rglob("*.dart"):
-        txt = p.read_text(encoding="utf-8", errors="ignore")
-        for m in re.finditer(r"^\s*import\s+['\"]([^'\"]+)['\"][^;]*;", txt, flags=re.M):
-            uri = m.group(1)
-
-            # Check if this import matches any deny pattern
-            denied = any(rx.match(f"{p.relative_to(ROOT)}:{uri}") for rx in deny_patterns)
+    with DartIndex() as index:
+        if changed is None:
+            records = index.refresh_tree(str(app), args.jobs)
+        else:
+            # Banned imports are a per-file property: only the diff needs checking
+            records = index.refresh(under(changed, str(app)), args.jobs)
+    for record in records:
+        rel = str(pathlib.Path(record["path"]).relative_to(ROOT))
+        for imp in record["imports"]:
+            uri = imp["uri"]
 
-            # If denied, check if it's explicitly allowed
-            if denied:
-                allowed = any(rx.match(uri) for rx in allow_patterns)
-                if not allowed:
-                    bad.append((str(p.relative_to(ROOT)), uri))
+            # Check if this import matches any deny pattern; if so, check if it's explicitly allowed
+            rule = deny.match(f"{rel}:{uri}")
+            if rule is not None and allow.match(uri) is None:
+                bad.append((rel, uri, rule))
 
     if bad:
         print("BANNED IMPORTS FOUND:")
-        for path, uri in bad:
-            print(f"- {path}: {uri}")
+        for path, uri, rule in bad:
+            print(f"- {path}: {uri}  (deny: {rule})")
         sys.exit(1)
-    target_display = APP
+    target_display = app
     try:
-        target_display = APP.relative_to(ROOT)
+        target_display = app.relative_to(ROOT)
     except ValueError:
         pass
-    print(f"✅ No banned imports in {target_display}")
+    scope = "" if changed is None else f" ({len(records)} changed files)"
+    print(f"✅ No banned imports in {target_display}{scope}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
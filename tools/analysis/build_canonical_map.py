@@ -6,47 +6,97 @@ Generates canonical map of files and their SHAs
 
 import os
 import json
+import hashlib
 import subprocess
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+
+def git_blob_sha(data: bytes) -> str:
+    """SHA of data as a git blob, identical to `git hash-object` without filters"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
 
 def get_git_sha(file_path: str) -> str:
     """Get SHA for a file"""
     try:
-        result = subprocess.run(
-            ['git', 'hash-object', file_path],
-            capture_output=True, text=True, check=True
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError:
+        with open(file_path, 'rb') as f:
+            return git_blob_sha(f.read())
+    except OSError:
         return "unknown"
 
-def build_canonical_map(base_path: str, include_features: bool = False) -> Dict[str, Any]:
-    """Build canonical map of all files"""
+def _git(base_path: str, *args: str) -> List[str]:
+    """Run a git command in base_path and return its NUL/newline separated output, or [] on failure."""
+    try:
+        result = subprocess.run(['git', '-C', base_path, *args], capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return []
+    sep = b'\0' if '-z' in args else b'\n'
+    return [item.decode('utf-8', errors='surrogateescape') for item in result.stdout.split(sep) if item]
+
+def load_index_shas(base_path: str) -> Dict[str, str]:
+    """Blob SHAs from the git index for tracked files whose worktree copy is unchanged.
+
+    Keys are paths relative to base_path. Files git reports as modified are left
+    out so they get hashed from disk instead.
+    """
+    shas = {}
+    for entry in _git(base_path, 'ls-files', '-s', '-z'):
+        info, path = entry.split('\t', 1)
+        mode, sha, _stage = info.split()
+        if mode != '160000':  # skip submodule gitlinks
+            shas[path] = sha
+    for path in _git(base_path, 'diff-files', '--name-only', '--relative', '-z'):
+        shas.pop(path, None)
+    return shas
+
+def build_canonical_map(base_path: str, include_features: bool = False,
+                        previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build canonical map of all files
+
+    With a previous map of the same base path, entries whose size and mtime are
+    unchanged keep their previous SHA and only the rest are re-hashed.
+    """
+    head = _git(base_path, 'rev-parse', 'HEAD', '--symbolic-full-name', 'HEAD')
     canonical_map = {
         "metadata": {
             "base_path": base_path,
-            "generated_at": subprocess.run(['date', '+%Y-%m-%d %H:%M:%S'], capture_output=True, text=True).stdout.strip(),
-            "head_commit": subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip(),
-            "branch": subprocess.run(['git', 'branch', '--show-current'], capture_output=True, text=True).stdout.strip()
+            "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "head_commit": head[0] if head else "",
+            "branch": head[1].replace('refs/heads/', '', 1) if len(head) > 1 and head[1] != 'HEAD' else ""
         },
         "files": {}
     }
 
+    previous_files = {}
+    if previous and previous.get("metadata", {}).get("base_path") == base_path:
+        previous_files = previous.get("files", {})
+        index_shas = {}
+    else:
+        # Unchanged tracked files come straight from the git index; everything else is hashed in-process
+        index_shas = load_index_shas(base_path)
+
     # Find all relevant files
-    file_extensions = ['.dart', '.yaml', '.json', '.md', '.sh', '.py', '.txt']
+    file_extensions = ('.dart', '.yaml', '.json', '.md', '.sh', '.py', '.txt')
     for root, dirs, files in os.walk(base_path):
         # Skip certain directories
         dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['.dart_tool', 'build', 'ios/Pods']]
 
         for file in files:
             file_path = os.path.join(root, file)
-            if any(file.endswith(ext) for ext in file_extensions):
+            if file.endswith(file_extensions):
                 relative_path = os.path.relpath(file_path, base_path)
+                st = os.stat(file_path)
+                entry = previous_files.get(relative_path)
+                if entry and entry["size"] == st.st_size and entry["modified"] == st.st_mtime:
+                    sha = entry["sha"]
+                else:
+                    sha = index_shas.get(relative_path.replace(os.sep, '/')) or get_git_sha(file_path)
                 canonical_map["files"][relative_path] = {
-                    "sha": get_git_sha(file_path),
-                    "size": os.path.getsize(file_path),
-                    "modified": os.path.getmtime(file_path)
+                    "sha": sha,
+                    "size": st.st_size,
+                    "modified": st.st_mtime
                 }
 
     if include_features:
@@ -60,21 +110,92 @@ def build_canonical_map(base_path: str, include_features: bool = False) -> Dict[
 
     return canonical_map
 
+def diff_canonical_maps(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Delta between two maps: added and modified entries, removed paths"""
+    old_files = previous.get("files", {})
+    new_files = current["files"]
+    return {
+        "metadata": {
+            "base_path": current["metadata"]["base_path"],
+            "from_generated_at": previous.get("metadata", {}).get("generated_at"),
+            "from_head_commit": previous.get("metadata", {}).get("head_commit"),
+            "to_generated_at": current["metadata"]["generated_at"],
+            "to_head_commit": current["metadata"]["head_commit"]
+        },
+        "added": {path: entry for path, entry in new_files.items() if path not in old_files},
+        "removed": sorted(path for path in old_files if path not in new_files),
+        "modified": {
+            path: entry for path, entry in new_files.items()
+            if path in old_files and old_files[path]["sha"] != entry["sha"]
+        }
+    }
+
+def write_canonical_map(canonical_map: Dict[str, Any], out_path: str, fmt: str = 'json') -> None:
+    """Write a map as pretty JSON, compact sorted JSON, or NDJSON (one file entry per line)"""
+    with open(out_path, 'w', encoding='utf-8') as f:
+        if fmt == 'json':
+            json.dump(canonical_map, f, indent=2, ensure_ascii=False)
+        elif fmt == 'compact':
+            json.dump(canonical_map, f, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        else:
+            for key, value in canonical_map.items():
+                if key != "files":
+                    f.write(json.dumps({key: value}, ensure_ascii=False) + '\n')
+            for path in sorted(canonical_map["files"]):
+                f.write(json.dumps(dict(path=path, **canonical_map["files"][path]), ensure_ascii=False) + '\n')
+
+def load_canonical_map(path: str) -> Dict[str, Any]:
+    """Load a map written in any write_canonical_map format"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    canonical_map: Dict[str, Any] = {"files": {}}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if "path" in record:
+            canonical_map["files"][record.pop("path")] = record
+        else:
+            canonical_map.update(record)
+    return canonical_map
+
 def main():
     import argparse
     parser = argparse.ArgumentParser(description='Build canonical map for Delivery Ways project')
     parser.add_argument('--out', required=True, help='Output file path')
+    parser.add_argument('--base', default=str(ROOT), help='Base path to map (default: repository root)')
     parser.add_argument('--features', action='store_true', help='Include features analysis')
+    parser.add_argument('--previous', help='Previous map to reuse SHAs from (re-hashes only size/mtime changes)')
+    parser.add_argument('--delta', help='Write added/removed/modified entries versus --previous to this file')
+    parser.add_argument('--format', choices=['json', 'compact', 'ndjson'], default='json',
+                        help='Output format: indented JSON (default), sorted compact JSON, or NDJSON')
 
     args = parser.parse_args()
 
-    base_path = "/Users/abdulrahman/Documents/GitHub/Delivery Ways/workspace_pruned/app"
-    canonical_map = build_canonical_map(base_path, args.features)
+    if args.delta and not args.previous:
+        parser.error('--delta requires --previous')
 
-    with open(args.out, 'w', encoding='utf-8') as f:
-        json.dump(canonical_map, f, indent=2, ensure_ascii=False)
+    previous = None
+    if args.previous and os.path.exists(args.previous):
+        previous = load_canonical_map(args.previous)
 
+    base_path = os.path.abspath(args.base)
+    canonical_map = build_canonical_map(base_path, args.features, previous)
+
+    write_canonical_map(canonical_map, args.out, args.format)
     print(f"Canonical map generated: {args.out}")
 
+    if args.delta:
+        delta = diff_canonical_maps(previous or {}, canonical_map)
+        with open(args.delta, 'w', encoding='utf-8') as f:
+            json.dump(delta, f, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        print(f"Delta: {len(delta['added'])} added, {len(delta['removed'])} removed, "
+              f"{len(delta['modified'])} modified -> {args.delta}")
+
 if __name__ == "__main__":
     main()
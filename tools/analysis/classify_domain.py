@@ -1,94 +1,147 @@
 #!/usr/bin/env python3
 """
-Classify analyzer errors by domain (commerce/mobility) based on ownership matrix.
+Classify analyzer errors by domain based on ownership matrix.
 """
 import json
 import fnmatch
+import re
+import sys
+from collections import Counter, defaultdict
+from functools import lru_cache
 from pathlib import Path
 
+import analyzer_output
+
 def load_ownership_matrix(matrix_file):
     """Load ownership matrix from JSON file."""
     with open(matrix_file, 'r', encoding='utf-8') as f:
         return json.load(f)
 
+class DomainClassifier:
+    """All domain globs of an ownership matrix compiled into one regex.
+
+    Every glob becomes an alternative in a named group tagged with its domain
+    (dom_N, since fnmatch.translate emits its own gN groups on some Python
+    versions), in matrix order, so the first matching alternative is the same domain the
+    per-glob fnmatch loop would pick. Results are memoized per file path.
+    """
+
+    def __init__(self, ownership_matrix):
+        self.fallback = ownership_matrix.get('fallbackDomain', 'uncategorized')
+        self.domains = list(ownership_matrix.get('domains', {}))
+        if self.fallback not in self.domains:
+            self.domains.append(self.fallback)
+
+        self.group_domains = {}
+        alternatives = []
+        for domain_name, domain_config in ownership_matrix.get('domains', {}).items():
+            for glob_pattern in domain_config.get('globs', []):
+                group = f"dom_{len(alternatives)}"
+                self.group_domains[group] = domain_name
+                alternatives.append(f"(?P<{group}>{fnmatch.translate(glob_pattern)})")
+        self.rx = re.compile('|'.join(alternatives)) if alternatives else None
+        self.cache = {}
+
+    def classify(self, file_path):
+        domain = self.cache.get(file_path)
+        if domain is None:
+            m = self.rx.match(file_path) if self.rx else None
+            domain = self.group_domains[m.lastgroup] if m else self.fallback
+            self.cache[file_path] = domain
+        return domain
+
+@lru_cache(maxsize=8)
+def _classifier(matrix_key):
+    return DomainClassifier(json.loads(matrix_key))
+
 def classify_file_domain(file_path, ownership_matrix):
-    """Classify a file into a domain based on ownership matrix."""
-    domains = ownership_matrix.get('domains', {})
+    """Classify a file into a domain based on ownership matrix.
+
+    The compiled classifier is reused across calls with an equal matrix.
+    """
+    return _classifier(json.dumps(ownership_matrix, sort_keys=True)).classify(file_path)
+
+def load_errors(analyzer_file, temp_report_file):
+    """Errors to classify and the reported total.
 
-    for domain_name, domain_config in domains.items():
-        globs = domain_config.get('globs', [])
-        for glob_pattern in globs:
-            # Convert glob to pattern that matches from lib/ onwards
-            if fnmatch.fnmatch(file_path, glob_pattern):
-                return domain_name
+    With an analyzer machine-output file every error is classified; otherwise
+    only the sample_errors of the temporary summary report are available.
+    """
+    if analyzer_file:
+        output = analyzer_output.load(analyzer_file)
+        errors = [
+            {'file': row['file'], 'line': row['line'], 'type': row['code'],
+             'message': row['message'], 'severity': row['severity']}
+            for row in output.rows()
+        ]
+        return errors, len(output)
 
-    return ownership_matrix.get('fallbackDomain', 'uncategorized')
+    with open(temp_report_file, 'r', encoding='utf-8') as f:
+        temp_data = json.load(f)
+    return temp_data.get('sample_errors', []), temp_data.get('total_errors', 0)
 
 def main():
-    # Load the temporary analyzer report
+    # Load the temporary analyzer report, or the raw analyzer output with --analyzer <file>
     temp_report_file = 'tools/reports/workspace_analyzer_truth_temp.json'
     matrix_file = 'tools/reports/ownership_matrix.json'
     output_file = 'tools/reports/workspace_analyzer_truth.json'
+    analyzer_file = None
 
-    # Check if temp report exists
-    if not Path(temp_report_file).exists():
+    i = 1
+    while i < len(sys.argv):
+        if sys.argv[i] == '--analyzer' and i + 1 < len(sys.argv):
+            analyzer_file = sys.argv[i + 1]
+            i += 2
+        else:
+            i += 1
+
+    # Load ownership matrix
+    if Path(matrix_file).exists():
+        ownership_matrix = load_ownership_matrix(matrix_file)
+    else:
+        ownership_matrix = {"domains": {}, "fallbackDomain": "uncategorized"}
+    classifier = DomainClassifier(ownership_matrix)
+
+    # Check if an input exists
+    if not analyzer_file and not Path(temp_report_file).exists():
         print(f"Temp report not found: {temp_report_file}")
-        # Create empty report
-        report = {
-            "total_errors": 0,
-            "issues": [],
-            "domain_summary": {
-                "commerce": {"count": 0, "files": []},
-                "mobility": {"count": 0, "files": []},
-                "uncategorized": {"count": 0, "files": []}
-            },
-            "ownership_matrix_version": "v1.0"
-        }
+        errors, total_errors = [], 0
     else:
-        with open(temp_report_file, 'r', encoding='utf-8') as f:
-            temp_data = json.load(f)
+        errors, total_errors = load_errors(analyzer_file, temp_report_file)
 
-        # Load ownership matrix
-        if Path(matrix_file).exists():
-            ownership_matrix = load_ownership_matrix(matrix_file)
-        else:
-            ownership_matrix = {"domains": {}, "fallbackDomain": "uncategorized"}
-
-        # Classify all errors
-        issues = []
-        domain_files = {
-            "commerce": set(),
-            "mobility": set(),
-            "uncategorized": set()
-        }
+    # Classify all errors in one pass
+    issues = []
+    domain_counts = Counter()
+    domain_files = defaultdict(set)
 
-        for error in temp_data.get('sample_errors', []):
-            domain = classify_file_domain(error['file'], ownership_matrix)
-            issue = {
-                "file": error['file'],
-                "line": error['line'],
-                "code": error['type'],
-                "message": error['message'],
-                "domain": domain,
-                "severity": error['severity']
-            }
-            issues.append(issue)
-            domain_files[domain].add(error['file'])
-
-        # Create domain summary
-        domain_summary = {}
-        for domain, files in domain_files.items():
-            domain_summary[domain] = {
-                "count": len([i for i in issues if i['domain'] == domain]),
-                "files": sorted(list(files))
-            }
-
-        report = {
-            "total_errors": temp_data.get('total_errors', 0),
-            "issues": issues,
-            "domain_summary": domain_summary,
-            "ownership_matrix_version": "v1.0"
+    for error in errors:
+        domain = classifier.classify(error['file'])
+        issues.append({
+            "file": error['file'],
+            "line": error['line'],
+            "code": error['type'],
+            "message": error['message'],
+            "domain": domain,
+            "severity": error['severity']
+        })
+        domain_counts[domain] += 1
+        domain_files[domain].add(error['file'])
+
+    # Create domain summary: every matrix domain, even when it has no issues
+    domain_summary = {
+        domain: {
+            "count": domain_counts[domain],
+            "files": sorted(domain_files[domain])
         }
+        for domain in classifier.domains
+    }
+
+    report = {
+        "total_errors": total_errors,
+        "issues": issues,
+        "domain_summary": domain_summary,
+        "ownership_matrix_version": "v1.0"
+    }
 
     # Write the final report
     with open(output_file, 'w', encoding='utf-8') as f:
@@ -6,7 +6,10 @@ import json
 from pathlib import Path
 from collections import defaultdict
 
-def scan_app_structure(app_root):
+from dart_index import DartIndex
+from parallel_scan import default_jobs
+
+def scan_app_structure(app_root, jobs=1):
     """Scan app structure for wiring needs."""
     wiring_gaps = {
         'missing_service_registrations': [],
@@ -18,21 +21,20 @@ def scan_app_structure(app_root):
     # Scan for service locator patterns
     service_locator_patterns = ['GetIt', 'Provider', 'Riverpod', 'BlocProvider']
 
-    for dart_file in Path(app_root).rglob('*.dart'):
-        try:
-            with open(dart_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-            for pattern in service_locator_patterns:
-                if pattern in content:
-                    wiring_gaps['missing_service_registrations'].append({
-                        'file': str(dart_file),
-                        'pattern': pattern,
-                        'needs_registration': True
-                    })
-
-        except Exception as e:
-            print(f"Error reading {dart_file}: {e}")
+    with DartIndex() as index:
+        records = index.refresh(Path(app_root).rglob('*.dart'), jobs)
+
+    for record in records:
+        # Identifiers are stored space-joined, so a substring test here matches
+        # the same identifiers as a test against the full file content.
+        identifiers = ' '.join(record['identifiers'])
+        for pattern in service_locator_patterns:
+            if pattern in identifiers:
+                wiring_gaps['missing_service_registrations'].append({
+                    'file': record['path'],
+                    'pattern': pattern,
+                    'needs_registration': True
+                })
 
     return wiring_gaps
 
@@ -89,11 +91,12 @@ def main():
     import sys
 
     if len(sys.argv) < 4:
-        print("Usage: python collect_foundation_gaps.py --app-root <app_root> --out <output_file>")
+        print("Usage: python collect_foundation_gaps.py --app-root <app_root> --out <output_file> [--jobs N]")
         sys.exit(1)
 
     app_root = None
     output_file = None
+    jobs = default_jobs()
 
     i = 1
     while i < len(sys.argv):
@@ -103,6 +106,9 @@ def main():
         elif sys.argv[i] == '--out' and i + 1 < len(sys.argv):
             output_file = sys.argv[i + 1]
             i += 2
+        elif sys.argv[i] == '--jobs' and i + 1 < len(sys.argv):
+            jobs = int(sys.argv[i + 1])
+            i += 2
         else:
             i += 1
 
@@ -113,7 +119,7 @@ def main():
     root_dir = Path(app_root).parent
 
     # Collect wiring gaps
-    wiring_gaps = scan_app_structure(app_root)
+    wiring_gaps = scan_app_structure(app_root, jobs)
     wiring_plan = analyze_shim_dependencies(root_dir)
 
     result = {
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Shared Dart source index for the tools/analysis scanners.
+
+Keeps a SQLite cache under tools/reports/.cache with each file's imports,
+exports, `as` prefixes, `part` directives, declarations (classes and enums,
+plus top-level mixins, extensions, typedefs, functions, getters and
+variables), the set of identifiers it mentions and an identifier -> line
+postings list, so reference lookups never have to re-read files. Entries are keyed by path + mtime + size with
+a content-hash fallback, so a tool only re-parses files that actually changed
+since the last run of any tool sharing the cache.
+"""
+
+import os
+import re
+import sys
+import hashlib
+import sqlite3
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional
+
+from parallel_scan import add_jobs_argument, scan_files
+
+ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_DB = ROOT / "tools" / "reports" / ".cache" / "dart_index.sqlite"
+
+# Bump whenever parse_dart_source changes shape or semantics; stale caches are dropped.
+PARSER_VERSION = "4"
+
+SKIP_DIRS = {'.dart_tool', 'build'}
+
+DIRECTIVE_RE = re.compile(r"^\s*(import|export|part(?:\s+of)?)\s+['\"]([^'\"]+)['\"]([^;]*);", re.M)
+PREFIX_RE = re.compile(r"\bas\s+(\w+)")
+DECLARATION_RE = re.compile(r'(?:(class|abstract class|interface)|enum)\s+(\w+)')
+# Other top-level declarations; dart format keeps only those at column 0. The
+# last alternative reads leading modifier/type tokens (including function
+# types like `void Function(int)`) and classifies what follows the name.
+TOP_LEVEL_RE = re.compile(r"""^(?:
+    (?:base[ \t]+)?mixin[ \t]+(?!class\b)(?P<mixin>[\w$]+)
+  | extension[ \t]+(?:type[ \t]+)?(?P<extension>[\w$]+)
+  | typedef[ \t]+(?:[^=;(\n]*?[ \t])?(?P<typedef>[\w$]+)[ \t]*(?:<[^=;\n]*>[ \t]*)?[=(]
+  | (?!(?:import|export|part|library|class|abstract|enum|sealed|base|interface|typedef|mixin|extension
+          |if|for|while|do|switch|case|default|return|assert|throw|else|try|catch|await|yield)\b)
+    (?:[\w$<>?,.\[\]]+(?:\([^()\n]*\)\??)?[ \t]+)*
+    (?: get[ \t]+(?P<getter>[\w$]+)[ \t]*(?:=>|\{)
+      | (?P<function>[A-Za-z_$][\w$]*)[ \t]*(?:<[^()=;\n]*>[ \t]*)?\(
+      | (?P<variable>[A-Za-z_$][\w$]*)[ \t]*(?:=(?!>)|;) )
+)""", re.M | re.X)
+IDENT_RE = re.compile(r'[A-Za-z_$][\w$]*')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER,
+    size INTEGER,
+    sha1 TEXT,
+    is_barrel INTEGER,
+    identifiers TEXT
+);
+CREATE TABLE IF NOT EXISTS directives (
+    path TEXT,
+    kind TEXT,
+    uri TEXT,
+    prefix TEXT,
+    combinators TEXT,
+    line INTEGER,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS directives_path ON directives(path);
+CREATE TABLE IF NOT EXISTS declarations (
+    path TEXT,
+    kind TEXT,
+    name TEXT,
+    line INTEGER
+);
+CREATE INDEX IF NOT EXISTS declarations_path ON declarations(path);
+CREATE TABLE IF NOT EXISTS postings (
+    identifier TEXT,
+    path TEXT,
+    lines TEXT
+);
+CREATE INDEX IF NOT EXISTS postings_identifier ON postings(identifier);
+CREATE INDEX IF NOT EXISTS postings_path ON postings(path);
+CREATE TABLE IF NOT EXISTS lines (
+    path TEXT,
+    line INTEGER,
+    text TEXT,
+    PRIMARY KEY (path, line)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS trees (path TEXT PRIMARY KEY);
+"""
+
+def find_dart_files(base_path: str) -> List[str]:
+    """Find all Dart files under base_path, skipping hidden and build directories."""
+    dart_files = []
+    for root, dirs, files in os.walk(base_path):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in SKIP_DIRS]
+        for file in files:
+            if file.endswith('.dart'):
+                dart_files.append(os.path.join(root, file))
+    return dart_files
+
+def is_barrel_source(content: str) -> bool:
+    """True if the file only holds exports, library/part directives and comments."""
+    has_export = False
+    for line in content.split('\n'):
+        line = line.strip()
+        if line.startswith('//') or not line:
+            continue
+        if line.startswith('export'):
+            has_export = True
+        elif not (line.startswith('library') or line.startswith('part')):
+            return False
+    return has_export
+
+def newline_offsets(content: str) -> List[int]:
+    """Offsets of every newline in content, for line lookups with line_at()."""
+    return [m.start() for m in re.finditer('\n', content)]
+
+def line_at(newlines: List[int], offset: int) -> int:
+    """1-based line number of a character offset, given newline_offsets()."""
+    return bisect_left(newlines, offset) + 1
+
+def parse_declarations(content: str, newlines: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Extract declarations with their 1-based line numbers, in source order.
+
+    Kinds are 'class' (class/interface) and 'enum' anywhere in the file, and
+    'mixin', 'extension', 'typedef', 'function', 'getter' and 'variable' for
+    top-level declarations.
+    """
+    if newlines is None:
+        newlines = newline_offsets(content)
+    found = [
+        (match.start(), 'class' if match.group(1) else 'enum', match.group(2))
+        for match in DECLARATION_RE.finditer(content)
+    ]
+    found += [(match.start(), match.lastgroup, match.group(match.lastgroup))
+              for match in TOP_LEVEL_RE.finditer(content)]
+    found.sort(key=lambda item: item[0])
+    return [{'kind': kind, 'name': name, 'line': line_at(newlines, offset)} for offset, kind, name in found]
+
+def parse_postings(content: str):
+    """Identifier -> line postings and (line, context) texts of the non-comment lines.
+
+    Each posting is a line number, negated for lines holding `class X` /
+    `enum X` for the identifier, which reference searches skip in the file
+    that defines X. Contexts are the stripped line cut to 100 characters.
+    """
+    postings: Dict[str, List[int]] = {}
+    texts = []
+    for line_num, line in enumerate(content.split('\n'), 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('//'):
+            continue
+        names = set(IDENT_RE.findall(line))
+        if not names:
+            continue
+        texts.append((line_num, stripped[:100]))
+        for name in names:
+            declares = f'class {name}' in line or f'enum {name}' in line
+            postings.setdefault(name, []).append(-line_num if declares else line_num)
+    return postings, texts
+
+def parse_dart_source(content: str) -> Dict[str, Any]:
+    """Parse one Dart source into the compact record stored in the index."""
+    newlines = newline_offsets(content)
+    directives = []
+    for match in DIRECTIVE_RE.finditer(content):
+        kind = ' '.join(match.group(1).split())
+        rest = match.group(3)
+        prefix_match = PREFIX_RE.search(rest) if kind == 'import' else None
+        directives.append({
+            'kind': kind,
+            'uri': match.group(2),
+            'prefix': prefix_match.group(1) if prefix_match else None,
+            'combinators': rest.strip(),
+            'line': line_at(newlines, match.start(1)),
+            'text': match.group(0).strip()
+        })
+
+    postings, texts = parse_postings(content)
+    return {
+        'directives': directives,
+        'declarations': parse_declarations(content, newlines),
+        'is_barrel': is_barrel_source(content),
+        'identifiers': sorted(set(IDENT_RE.findall(content))),
+        'postings': postings,
+        'lines': texts
+    }
+
+def _read_and_parse(item):
+    """Worker: hash one file and parse it unless its content matches the cached hash.
+
+    Returns (sha1, record, error); record is None when the cached entry is still valid.
+    """
+    path, _, _, cached_sha1 = item
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return None, None, str(e)
+    sha1 = hashlib.sha1(data).hexdigest()
+    if sha1 == cached_sha1:
+        return sha1, None, None
+    return sha1, parse_dart_source(data.decode('utf-8', errors='ignore')), None
+
+def _with_views(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Add per-kind directive views (imports/exports/parts) to a record."""
+    directives = record['directives']
+    record['imports'] = [d for d in directives if d['kind'] == 'import']
+    record['exports'] = [d for d in directives if d['kind'] == 'export']
+    record['parts'] = [d for d in directives if d['kind'] in ('part', 'part of')]
+    return record
+
+class DartIndex:
+    """Content-addressed cache of parsed Dart files shared by the analysis tools.
+
+    Set DART_INDEX_DB to relocate the cache, or to ':memory:' to disable persistence.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        db_path = db_path or os.environ.get("DART_INDEX_DB") or str(DEFAULT_DB)
+        if db_path != ':memory:':
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'parser_version'").fetchone()
+        if not row or row[0] != PARSER_VERSION:
+            with self.db:
+                self.db.execute("DELETE FROM files")
+                self.db.execute("DELETE FROM directives")
+                self.db.execute("DELETE FROM declarations")
+                self.db.execute("DELETE FROM postings")
+                self.db.execute("DELETE FROM lines")
+                self.db.execute("DELETE FROM trees")
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('parser_version', ?)", (PARSER_VERSION,))
+        self.parsed_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def refresh(self, paths: Iterable[str], jobs: int = 1) -> List[Dict[str, Any]]:
+        """Return one record per readable path, re-parsing only files that changed.
+
+        Records keep the order and spelling of ``paths``; each carries ``path``,
+        ``imports``, ``exports``, ``parts``, ``declarations``, ``is_barrel`` and
+        ``identifiers``. The cache itself is keyed by absolute path. Changed
+        files are read, hashed and parsed across ``jobs`` worker processes.
+        """
+        given = [str(p) for p in paths]
+        paths = [os.path.abspath(p) for p in given]
+        cached = {}
+        for chunk_start in range(0, len(paths), 500):
+            chunk = paths[chunk_start:chunk_start + 500]
+            marks = ','.join('?' * len(chunk))
+            for path, mtime_ns, size, sha1 in self.db.execute(
+                    f"SELECT path, mtime_ns, size, sha1 FROM files WHERE path IN ({marks})", chunk):
+                cached[path] = (mtime_ns, size, sha1)
+
+        fresh, candidates = [], []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                print(f"Error reading {path}: {e}", file=sys.stderr)
+                continue
+            entry = cached.get(path)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                fresh.append(path)
+            else:
+                candidates.append((path, st.st_mtime_ns, st.st_size, entry[2] if entry else None))
+
+        results = scan_files(candidates, _read_and_parse, jobs)
+
+        touched, parsed = [], {}
+        with self.db:
+            for (path, mtime_ns, size, _), (sha1, record, error) in zip(candidates, results):
+                if error:
+                    print(f"Error reading {path}: {error}", file=sys.stderr)
+                elif record is None:
+                    # Touched but unchanged (checkout, rebase): refresh the stat key only.
+                    touched.append((mtime_ns, size, path))
+                    fresh.append(path)
+                else:
+                    self._store(path, mtime_ns, size, sha1, record)
+                    # Postings stay in the database; see references()
+                    del record['postings'], record['lines']
+                    parsed[path] = record
+            if touched:
+                self.db.executemany("UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?", touched)
+        self.parsed_count += len(parsed)
+
+        loaded = self._load(fresh)
+        records = []
+        for name, path in zip(given, paths):
+            record = parsed.get(path) or loaded.get(path)
+            if record is not None:
+                records.append(_with_views(dict(record, path=name)))
+        return records
+
+    def refresh_tree(self, base_path: str, jobs: int = 1) -> List[Dict[str, Any]]:
+        """Refresh every Dart file under base_path and remember the tree as fully indexed.
+
+        Cached entries under base_path whose files have disappeared are dropped.
+        """
+        records = self.refresh(find_dart_files(base_path), jobs)
+        base = os.path.abspath(base_path)
+        seen = {os.path.abspath(r['path']) for r in records}
+        gone = [(p,) for p in self._cached_under(base) if p not in seen]
+        with self.db:
+            self._forget(gone)
+            self.db.execute("INSERT OR REPLACE INTO trees VALUES (?)", (base,))
+        return records
+
+    def refresh_changed(self, base_path: str, changed: List[str], jobs: int = 1) -> List[Dict[str, Any]]:
+        """Records for every Dart file under base_path, re-reading only what changed.
+
+        ``changed`` adds files the cache has not seen yet; every cached file is
+        still re-stat'ed (but only re-parsed if its stat key moved), so a cache
+        built on another checkout cannot serve stale records. Paths that no
+        longer exist are dropped from the cache. Falls back to refresh_tree()
+        until base_path (or a parent) has been fully indexed.
+        """
+        base = os.path.abspath(base_path)
+        trees = {row[0] for row in self.db.execute("SELECT path FROM trees")}
+        if not any(base == t or base.startswith(t + os.sep) for t in trees):
+            return self.refresh_tree(base_path, jobs)
+
+        changed = [os.path.abspath(p) for p in changed if p.endswith('.dart')]
+        changed_set = set(changed)
+        paths = changed + [p for p in self._cached_under(base) if p not in changed_set]
+        existing = [p for p in paths if os.path.exists(p)]
+        if len(existing) < len(paths):
+            alive = set(existing)
+            with self.db:
+                self._forget([(p,) for p in paths if p not in alive])
+        return self.refresh(existing, jobs)
+
+    def _cached_under(self, base: str) -> List[str]:
+        prefix = base + os.sep
+        return [row[0] for row in self.db.execute(
+            "SELECT path FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))]
+
+    def _forget(self, paths: List[tuple]) -> None:
+        for table in ('files', 'directives', 'declarations', 'postings', 'lines'):
+            self.db.executemany(f"DELETE FROM {table} WHERE path = ?", paths)
+
+    def _store(self, path: str, mtime_ns: int, size: int, sha1: str, record: Dict[str, Any]) -> None:
+        self.db.execute("DELETE FROM directives WHERE path = ?", (path,))
+        self.db.execute("DELETE FROM declarations WHERE path = ?", (path,))
+        self.db.execute("DELETE FROM postings WHERE path = ?", (path,))
+        self.db.execute("DELETE FROM lines WHERE path = ?", (path,))
+        self.db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+            (path, mtime_ns, size, sha1, int(record['is_barrel']), ' '.join(record['identifiers']))
+        )
+        self.db.executemany(
+            "INSERT INTO directives VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(path, d['kind'], d['uri'], d['prefix'], d['combinators'], d['line'], d['text']) for d in record['directives']]
+        )
+        self.db.executemany(
+            "INSERT INTO declarations VALUES (?, ?, ?, ?)",
+            [(path, d['kind'], d['name'], d['line']) for d in record['declarations']]
+        )
+        self.db.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                            [(name, path, ' '.join(map(str, lines))) for name, lines in record['postings'].items()])
+        self.db.executemany("INSERT INTO lines VALUES (?, ?, ?)",
+                            [(path, line, text) for line, text in record['lines']])
+
+    def references(self, identifiers: Iterable[str]) -> List[tuple]:
+        """(identifier, absolute path, line, declares, context) for every indexed use of identifiers.
+
+        Only covers files already indexed by refresh(); ordered by path and line.
+        """
+        identifiers = sorted(set(identifiers))
+        hits = []
+        for chunk_start in range(0, len(identifiers), 500):
+            chunk = identifiers[chunk_start:chunk_start + 500]
+            marks = ','.join('?' * len(chunk))
+            for name, path, lines in self.db.execute(
+                    f"SELECT identifier, path, lines FROM postings WHERE identifier IN ({marks})", chunk):
+                hits.extend((name, path, abs(line), line < 0) for line in map(int, lines.split()))
+        hits.sort(key=lambda hit: (hit[1], hit[2], hit[0]))
+
+        texts = {}
+        for path in sorted({hit[1] for hit in hits}):
+            wanted = sorted({hit[2] for hit in hits if hit[1] == path})
+            for chunk_start in range(0, len(wanted), 500):
+                chunk = wanted[chunk_start:chunk_start + 500]
+                marks = ','.join('?' * len(chunk))
+                for line, text in self.db.execute(
+                        f"SELECT line, text FROM lines WHERE path = ? AND line IN ({marks})", [path, *chunk]):
+                    texts[path, line] = text
+        return [(name, path, line, declares, texts[path, line]) for name, path, line, declares in hits]
+
+    def _load(self, paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        records = {}
+        for chunk_start in range(0, len(paths), 500):
+            chunk = paths[chunk_start:chunk_start + 500]
+            marks = ','.join('?' * len(chunk))
+            for path, is_barrel, identifiers in self.db.execute(
+                    f"SELECT path, is_barrel, identifiers FROM files WHERE path IN ({marks})", chunk):
+                records[path] = {
+                    'directives': [],
+                    'declarations': [],
+                    'is_barrel': bool(is_barrel),
+                    'identifiers': identifiers.split() if identifiers else []
+                }
+            for path, kind, uri, prefix, combinators, line, text in self.db.execute(
+                    f"SELECT path, kind, uri, prefix, combinators, line, text FROM directives "
+                    f"WHERE path IN ({marks}) ORDER BY rowid", chunk):
+                records[path]['directives'].append({
+                    'kind': kind, 'uri': uri, 'prefix': prefix,
+                    'combinators': combinators, 'line': line, 'text': text
+                })
+            for path, kind, name, line in self.db.execute(
+                    f"SELECT path, kind, name, line FROM declarations "
+                    f"WHERE path IN ({marks}) ORDER BY rowid", chunk):
+                records[path]['declarations'].append({'kind': kind, 'name': name, 'line': line})
+        return records
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Warm or inspect the shared Dart source index')
+    parser.add_argument('--path', default=str(ROOT), help='Base path to index')
+    parser.add_argument('--importers', metavar='REGEX', help='List files with an import URI matching REGEX')
+    add_jobs_argument(parser)
+
+    args = parser.parse_args()
+
+    with DartIndex() as index:
+        records = index.refresh_tree(args.path, args.jobs)
+        if args.importers:
+            rx = re.compile(args.importers)
+            for record in records:
+                if any(rx.search(imp['uri']) for imp in record['imports']):
+                    print(record['path'])
+        else:
+            print(f"Indexed {len(records)} Dart files ({index.parsed_count} re-parsed)")
+
+if __name__ == '__main__':
+    main()
@@ -4,26 +4,45 @@ Extract build errors from Flutter build output and generate structured JSON repo
 """
 
 import json
+import os
 import re
+import sys
+import time
 from collections import defaultdict
 
-def parse_build_errors(build_output):
-    """Parse Flutter build output to extract structured error information."""
+# file:line:col: Error: message
+ERROR_RE = re.compile(r'([^:]+):(\d+):(\d+):\s*Error:\s*(.+)')
 
-    errors = []
-    current_error = None
+# (category, alternatives); a category applies when every needle of any one
+# alternative occurs in the lowercased message. First matching row wins.
+CATEGORY_RULES = (
+    ('undefined_symbol', (('undefined',), ('not defined',))),
+    ('missing_type', (('type', 'not found'),)),
+    ('duplicate_export', (('exported from both',),)),
+    ('type_mismatch', (("can't be assigned",),)),
+    ('null_safety', (('non-nullable',),)),
+)
 
-    lines = build_output.split('\n')
+DEFAULT_LOG = "B-central/reports/CENT_BUILD02_android_build.tail.txt"
+DEFAULT_OUT = "B-central/reports/CENT_BUILD02_build_errors.json"
 
-    for line in lines:
-        # Look for error lines that match the pattern: file:line:col: Error: message
-        error_match = re.match(r'([^:]+):(\d+):(\d+):\s*Error:\s*(.+)', line)
-        if error_match:
-            if current_error:
-                errors.append(current_error)
+class BuildErrorParser:
+    """Line-at-a-time parser that hands back each error once its block is complete.
+
+    A block starts at a ``file:line:col: Error:`` line, absorbs following
+    non-blank lines, and ends at a blank line or the next error line.
+    """
 
+    def __init__(self):
+        self.current = None
+
+    def feed(self, line):
+        """Consume one log line; return the error it completed, if any."""
+        error_match = ERROR_RE.match(line)
+        if error_match:
+            completed = self.current
             file_path, line_num, col_num, message = error_match.groups()
-            current_error = {
+            self.current = {
                 'file': file_path,
                 'line': int(line_num),
                 'column': int(col_num),
@@ -31,18 +50,39 @@ def parse_build_errors(build_output):
                 'package': extract_package_from_path(file_path),
                 'category': categorize_error(message)
             }
-        elif current_error and line.strip():
+            return completed
+
+        stripped = line.strip()
+        if self.current and stripped:
             # Continuation of error message
-            current_error['message'] += ' ' + line.strip()
-        elif current_error and not line.strip():
+            self.current['message'] += ' ' + stripped
+        elif self.current:
             # End of error block
-            errors.append(current_error)
-            current_error = None
+            completed, self.current = self.current, None
+            return completed
+        return None
 
-    if current_error:
-        errors.append(current_error)
+    def finish(self):
+        """Return the error still open at end of input, if any."""
+        completed, self.current = self.current, None
+        return completed
 
-    return errors
+def iter_build_errors(lines):
+    """Yield errors from an iterable of log lines as each block completes."""
+    parser = BuildErrorParser()
+    for line in lines:
+        error = parser.feed(line)
+        if error:
+            yield error
+    error = parser.finish()
+    if error:
+        yield error
+
+def parse_build_errors(build_output):
+    """Parse Flutter build output (a string or an iterable of lines) into error records."""
+    if isinstance(build_output, str):
+        build_output = build_output.split('\n')
+    return list(iter_build_errors(build_output))
 
 def extract_package_from_path(file_path):
     """Extract package name from file path."""
@@ -57,63 +97,163 @@ def extract_package_from_path(file_path):
 
 def categorize_error(message):
     """Categorize error by type."""
-    if 'undefined' in message.lower() or 'not defined' in message.lower():
-        return 'undefined_symbol'
-    elif 'type' in message.lower() and 'not found' in message.lower():
-        return 'missing_type'
-    elif 'exported from both' in message.lower():
-        return 'duplicate_export'
-    elif 'can\'t be assigned' in message.lower():
-        return 'type_mismatch'
-    elif 'non-nullable' in message.lower():
-        return 'null_safety'
-    else:
-        return 'other'
+    lowered = message.lower()
+    for category, alternatives in CATEGORY_RULES:
+        for needles in alternatives:
+            if all(needle in lowered for needle in needles):
+                return category
+    return 'other'
+
+class BuildErrorReport:
+    """Incremental aggregation of errors into the report layout."""
+
+    def __init__(self):
+        self.total = 0
+        self.by_package = defaultdict(list)
+        self.by_category = defaultdict(list)
+        self.samples = []
+
+    def add(self, error):
+        self.total += 1
+        self.by_package[error['package']].append(error)
+        self.by_category[error['category']].append(error)
+        if len(self.samples) < 10:
+            self.samples.append(error)
+
+    def result(self):
+        by_package = self.by_package
+        summary = {
+            'total_errors': self.total,
+            'packages_affected': len(by_package),
+            'categories': {category: len(errs) for category, errs in self.by_category.items()},
+            'top_packages': sorted(by_package.keys(), key=lambda x: len(by_package[x]), reverse=True)[:5]
+        }
+        return {
+            'summary': summary,
+            'errors_by_package': dict(by_package),
+            'errors_by_category': dict(self.by_category),
+            'sample_errors': self.samples  # First 10 errors as samples
+        }
 
 def generate_error_report(build_output):
-    """Generate comprehensive error report."""
-
-    errors = parse_build_errors(build_output)
-
-    # Group by package
-    by_package = defaultdict(list)
-    for error in errors:
-        by_package[error['package']].append(error)
-
-    # Group by category
-    by_category = defaultdict(list)
-    for error in errors:
-        by_category[error['category']].append(error)
-
-    # Summary stats
-    summary = {
-        'total_errors': len(errors),
-        'packages_affected': len(by_package),
-        'categories': dict(by_category.keys()),
-        'top_packages': sorted(by_package.keys(), key=lambda x: len(by_package[x]), reverse=True)[:5]
-    }
-
-    return {
-        'summary': summary,
-        'errors_by_package': dict(by_package),
-        'errors_by_category': dict(by_category),
-        'sample_errors': errors[:10]  # First 10 errors as samples
-    }
+    """Generate comprehensive error report from a log string or an iterable of lines."""
+    report = BuildErrorReport()
+    if isinstance(build_output, str):
+        build_output = build_output.split('\n')
+    for error in iter_build_errors(build_output):
+        report.add(error)
+    return report.result()
+
+def write_report(report, out_path):
+    """Write the report atomically so readers never see a half-written file."""
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, out_path)
+
+def follow_lines(f, idle_timeout, poll_interval=0.25):
+    """Yield complete lines from a growing file, None on every idle poll.
+
+    Stops after idle_timeout seconds without new data. Partial lines are held
+    back until the writer finishes them.
+    """
+    pending = ''
+    last_data = time.monotonic()
+    while True:
+        chunk = f.readline()
+        if chunk:
+            last_data = time.monotonic()
+            pending += chunk
+            if pending.endswith('\n'):
+                yield pending
+                pending = ''
+            continue
+        if time.monotonic() - last_data >= idle_timeout:
+            break
+        yield None
+        time.sleep(poll_interval)
+    if pending:
+        yield pending
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Extract build errors from Flutter/Gradle build output')
+    parser.add_argument('--log', default=DEFAULT_LOG, help=f'Build log to read, - for stdin (default: {DEFAULT_LOG})')
+    parser.add_argument('--out', default=DEFAULT_OUT, help=f'Report path (default: {DEFAULT_OUT})')
+    parser.add_argument('--follow', action='store_true',
+                        help='Keep reading a growing log and rewrite the report as errors complete')
+    parser.add_argument('--interval', type=float, default=2.0,
+                        help='Minimum seconds between report rewrites in --follow mode (default: 2)')
+    parser.add_argument('--idle-timeout', type=float, default=120.0,
+                        help='Stop following a log file after this many seconds without new output (default: 120)')
+    parser.add_argument('--events', help='Append one NDJSON event per error (and a final summary) to this file, - for stdout')
+    parser.add_argument('--fail-fast', type=int, metavar='N',
+                        help='Stop and exit 1 as soon as N errors have been found')
+    args = parser.parse_args()
+
+    report = BuildErrorReport()
+    error_parser = BuildErrorParser()
+    events = None
+    failed = False
+    # Keep stdout pure NDJSON when events go there
+    status = sys.stderr if args.events == '-' else sys.stdout
+
+    def emit(event):
+        if events:
+            events.write(json.dumps(event, ensure_ascii=False) + '\n')
+            events.flush()
+
+    def add(error):
+        report.add(error)
+        emit(dict(event='error', **error))
+        return args.fail_fast is not None and report.total >= args.fail_fast
 
-if __name__ == "__main__":
     try:
-        with open("B-central/reports/CENT_BUILD02_android_build.tail.txt", "r", encoding="utf-8") as f:
-            build_output = f.read()
+        if args.events == '-':
+            events = sys.stdout
+        elif args.events:
+            events = open(args.events, 'a', encoding='utf-8')
+
+        if args.log == '-':
+            sys.stdin.reconfigure(encoding='utf-8', errors='replace')
+            log = sys.stdin
+        else:
+            log = open(args.log, "r", encoding="utf-8", errors="replace")
+
+        with log:
+            # A pipe already blocks until the writer has more; only files need polling
+            lines = follow_lines(log, args.idle_timeout) if args.follow and log is not sys.stdin else log
+            last_write = time.monotonic()
+            dirty = False
+            for line in lines:
+                if line is not None:
+                    error = error_parser.feed(line)
+                    if error:
+                        dirty = True
+                        failed = add(error)
+                        if failed:
+                            break
+                if args.follow and dirty and time.monotonic() - last_write >= args.interval:
+                    write_report(report.result(), args.out)
+                    last_write = time.monotonic()
+                    dirty = False
 
-        report = generate_error_report(build_output)
+        if not failed:
+            error = error_parser.finish()
+            if error:
+                failed = add(error)
 
-        with open("B-central/reports/CENT_BUILD02_build_errors.json", "w", encoding="utf-8") as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        result = report.result()
+        write_report(result, args.out)
+        emit(dict(event='summary', **result['summary']))
 
-        print(f"✅ Generated build error report: {report['summary']['total_errors']} errors found")
+        if failed:
+            print(f"❌ Stopped after {report.total} errors (--fail-fast {args.fail_fast}): {args.out}", file=status)
+        else:
+            print(f"✅ Generated build error report: {result['summary']['total_errors']} errors found", file=status)
 
     except Exception as e:
-        print(f"❌ Error processing build output: {e}")
+        print(f"❌ Error processing build output: {e}", file=status)
         # Create minimal report
         minimal_report = {
             'summary': {'total_errors': 0, 'error': str(e)},
@@ -122,5 +262,13 @@ if __name__ == "__main__":
             'sample_errors': []
         }
 
-        with open("B-central/reports/CENT_BUILD02_build_errors.json", "w", encoding="utf-8") as f:
-            json.dump(minimal_report, f, indent=2, ensure_ascii=False)
+        write_report(minimal_report, args.out)
+    finally:
+        if events and events is not sys.stdout:
+            events.close()
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -3,126 +3,249 @@
 Extract missing contracts from analyzer output and generate plans.
 """
 import json
+import os
 import re
-from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
+from functools import lru_cache
+
+import analyzer_output
+from dart_index import ROOT, DartIndex
+from parallel_scan import default_jobs
+
+UNDEFINED_CODES = ['UNDEFINED_IDENTIFIER', 'UNDEFINED_CLASS', 'UNDEFINED_FUNCTION']
+
+# One pass over a message finds whichever symbol pattern it contains.
+SYMBOL_RE = re.compile(
+    r"Undefined name '(?P<name>[^']+)'"
+    r"|The function '(?P<function>[^']+)' isn't defined"
+    r"|Undefined class '(?P<class>[^']+)'"
+    r"|Target of URI doesn't exist: '(?P<uri>[^']+)'"
+)
+
+# Keyed by whole messages, so bounded: repeats cluster, the tail is unique.
+@lru_cache(maxsize=65536)
+def extract_symbol(message):
+    """(group, symbol) for the first symbol pattern in message, or (None, None)."""
+    match = SYMBOL_RE.search(message)
+    if match is None:
+        return None, None
+    return match.lastgroup, match.group(match.lastgroup)
 
 def parse_analyzer_errors(analyzer_file):
     """Parse analyzer errors to find missing symbols."""
     missing_symbols = []
+    output = analyzer_output.load(analyzer_file)
 
-    if not Path(analyzer_file).exists():
-        return missing_symbols
-
-    with open(analyzer_file, 'r', encoding='utf-8', errors='ignore') as f:
-        for line in f:
-            if '|' in line:
-                parts = line.strip().split('|')
-                if len(parts) >= 7:
-                    severity = parts[0]
-                    error_type = parts[1]
-                    sub_type = parts[2]
-                    file_path = parts[3]
-                    message = '|'.join(parts[6:]) if len(parts) > 6 else ""
-
-                    # Look for undefined symbols
-                    if sub_type in ['UNDEFINED_IDENTIFIER', 'UNDEFINED_CLASS', 'UNDEFINED_FUNCTION']:
-                        # Extract symbol name from message
-                        symbol_match = re.search(r'Undefined name \'([^\']+)\'', message)
-                        if symbol_match:
-                            symbol = symbol_match.group(1)
-                        else:
-                            # Try other patterns
-                            symbol_match = re.search(r'The function \'([^\']+)\' isn\'t defined', message)
-                            if symbol_match:
-                                symbol = symbol_match.group(1)
-                            else:
-                                symbol_match = re.search(r'Undefined class \'([^\']+)\'', message)
-                                if symbol_match:
-                                    symbol = symbol_match.group(1)
-
-                        if symbol_match:
-                            missing_symbols.append({
-                                'symbol': symbol,
-                                'error_type': sub_type,
-                                'file': file_path,
-                                'message': message,
-                                'context': 'undefined_symbol'
-                            })
-
-                    # Extract URI issues
-                    elif sub_type == 'URI_DOES_NOT_EXIST':
-                        uri_match = re.search(r'Target of URI doesn\'t exist: \'([^\']+)\'', message)
-                        if uri_match:
-                            uri = uri_match.group(1)
-                            missing_symbols.append({
-                                'symbol': uri,
-                                'error_type': sub_type,
-                                'file': file_path,
-                                'message': message,
-                                'context': 'missing_uri'
-                            })
+    for row in output.rows(output.with_codes(UNDEFINED_CODES + ['URI_DOES_NOT_EXIST'])):
+        sub_type = row['code']
+        message = row['message']
+        group, symbol = extract_symbol(message)
+        if group is None:
+            continue
+
+        # Undefined symbols vs. missing URIs
+        if sub_type in UNDEFINED_CODES:
+            if group == 'uri':
+                continue
+            context = 'undefined_symbol'
+        elif group == 'uri':
+            context = 'missing_uri'
+        else:
+            continue
+
+        missing_symbols.append({
+            'symbol': symbol,
+            'error_type': sub_type,
+            'file': row['file'],
+            'message': message,
+            'context': context
+        })
 
     return missing_symbols
 
+FEATURE_PATTERNS = {
+    'payments': ['payment', 'stripe', 'card', 'transaction'],
+    'mobility': ['location', 'geolocator', 'map', 'permission', 'background'],
+    'notifications': ['notification', 'firebase', 'token', 'subscribe'],
+    'auth': ['auth', 'login', 'session', 'user'],
+    'device_security': ['device', 'security', 'biometric', 'jailbreak'],
+    'telemetry': ['analytics', 'tracking', 'observability'],
+    'files': ['file', 'upload', 'download'],
+    'rbac': ['role', 'permission', 'access'],
+    'config': ['config', 'settings'],
+    'consent': ['consent', 'privacy', 'gdpr']
+}
+
+class KeywordAutomaton:
+    """Aho-Corasick matcher over (label, keywords) pairs.
+
+    ``first_label`` scans a text once and returns the earliest label in table
+    order having any keyword in it, which is what checking each label's
+    keywords in turn would return.
+    """
+
+    def __init__(self, table):
+        self.labels = list(table)
+        self.goto = [{}]
+        self.best = [len(self.labels)]  # lowest label rank ending at each state
+        for rank, label in enumerate(self.labels):
+            for keyword in table[label]:
+                state = 0
+                for ch in keyword:
+                    nxt = self.goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(self.goto)
+                        self.goto[state][ch] = nxt
+                        self.goto.append({})
+                        self.best.append(len(self.labels))
+                    state = nxt
+                self.best[state] = min(self.best[state], rank)
+
+        # Breadth-first failure links; fold each state's suffix matches into best
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.best[nxt] = min(self.best[nxt], self.best[self.fail[nxt]])
+                queue.append(nxt)
+
+    def first_label(self, text):
+        goto, fail, best = self.goto, self.fail, self.best
+        found = len(self.labels)
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if best[state] < found:
+                found = best[state]
+                if found == 0:
+                    break
+        return self.labels[found] if found < len(self.labels) else None
+
+FEATURE_AUTOMATON = KeywordAutomaton(FEATURE_PATTERNS)
+
+@lru_cache(maxsize=None)
+def feature_for_symbol(symbol_name):
+    """Feature area of a symbol name, or 'other'."""
+    return FEATURE_AUTOMATON.first_label(symbol_name.lower()) or 'other'
+
 def categorize_by_feature(symbols):
     """Categorize missing symbols by feature area."""
-    feature_patterns = {
-        'payments': ['payment', 'stripe', 'card', 'transaction'],
-        'mobility': ['location', 'geolocator', 'map', 'permission', 'background'],
-        'notifications': ['notification', 'firebase', 'token', 'subscribe'],
-        'auth': ['auth', 'login', 'session', 'user'],
-        'device_security': ['device', 'security', 'biometric', 'jailbreak'],
-        'telemetry': ['analytics', 'tracking', 'observability'],
-        'files': ['file', 'upload', 'download'],
-        'rbac': ['role', 'permission', 'access'],
-        'config': ['config', 'settings'],
-        'consent': ['consent', 'privacy', 'gdpr']
-    }
-
     categorized = defaultdict(list)
 
     for symbol in symbols:
-        symbol_name = symbol['symbol'].lower()
-        matched = False
-
-        for feature, patterns in feature_patterns.items():
-            if any(pattern in symbol_name for pattern in patterns):
-                categorized[feature].append(symbol)
-                matched = True
-                break
-
-        if not matched:
-            categorized['other'].append(symbol)
+        categorized[feature_for_symbol(symbol['symbol'])].append(symbol)
 
     return dict(categorized)
 
-def generate_rewire_plan(symbols, canonical_map):
+COMBINATOR_RE = re.compile(r'\b(show|hide)\s+([\w$,\s]+?)(?=\s+(?:show|hide)\b|$)')
+
+def _resolve_uri(uri, from_file, packages_dir):
+    """Absolute path of a package:/relative Dart URI inside the tree, or None."""
+    if uri.startswith('package:'):
+        package, _, rest = uri[len('package:'):].partition('/')
+        return os.path.join(packages_dir, package, 'lib', rest)
+    if ':' in uri:
+        return None  # dart: and other schemes
+    return os.path.normpath(os.path.join(os.path.dirname(from_file), uri))
+
+def _apply_combinators(names, combinators):
+    for keyword, listed in COMBINATOR_RE.findall(combinators):
+        listed = {name.strip() for name in listed.split(',') if name.strip()}
+        names = names & listed if keyword == 'show' else names - listed
+    return names
+
+def build_shim_symbol_index(packages_dir, jobs=1):
+    """Map each symbol a *_shims package exposes to the imports that provide it.
+
+    Declarations (classes, enums and top-level mixins, extensions, typedefs,
+    functions, getters and variables such as providers) come from the shared
+    Dart index. Exports (including re-exports of other in-tree packages and
+    show/hide combinators) are followed transitively from every public
+    library of each shim package; the package's own barrel is listed first.
+    Export cycles (a.dart exports b.dart, which exports a.dart) resolve to
+    the same sets whatever the traversal order.
+    """
+    packages_dir = os.path.abspath(packages_dir)
+    with DartIndex() as index:
+        records = {os.path.abspath(r['path']): r for r in index.refresh_tree(packages_dir, jobs)}
+
+    # Own declarations (including parts) of every library, then exports
+    # propagated until nothing changes: show/hide only ever filter, so the
+    # sets grow monotonically to the least fixpoint
+    exported = {}
+    edges = {}
+    for path, record in records.items():
+        names = {d['name'] for d in record['declarations']}
+        for part in record['parts']:
+            if part['kind'] == 'part':
+                part_record = records.get(_resolve_uri(part['uri'], path, packages_dir))
+                if part_record:
+                    names.update(d['name'] for d in part_record['declarations'])
+        exported[path] = names
+        targets = [(_resolve_uri(e['uri'], path, packages_dir), e['combinators']) for e in record['exports']]
+        targets = [(target, combinators) for target, combinators in targets if target in records]
+        if targets:
+            edges[path] = targets
+
+    changed = True
+    while changed:
+        changed = False
+        for path, targets in edges.items():
+            names = exported[path]
+            for target, combinators in targets:
+                added = _apply_combinators(exported[target], combinators) - names
+                if added:
+                    names |= added
+                    changed = True
+
+    def exported_symbols(path):
+        return exported.get(path, set())
+
+    shim_index = defaultdict(list)
+    for package in sorted(os.listdir(packages_dir)):
+        lib_dir = os.path.join(packages_dir, package, 'lib')
+        if not package.endswith('_shims') or not os.path.isdir(lib_dir):
+            continue
+        barrel = os.path.join(lib_dir, f'{package}.dart')
+        libraries = sorted(
+            (p for p in records if p.startswith(lib_dir + os.sep)
+             and not p.startswith(os.path.join(lib_dir, 'src') + os.sep)),
+            key=lambda p: (p != barrel, p)
+        )
+        provided = set()
+        for library in libraries:
+            for name in exported_symbols(library) - provided:
+                shim_index[name].append({
+                    'shim': package,
+                    'package_import': f"package:{package}/{os.path.relpath(library, lib_dir).replace(os.sep, '/')}"
+                })
+            provided |= exported_symbols(library)
+    return dict(shim_index)
+
+def generate_rewire_plan(symbols, shim_index):
     """Generate import rewiring plan."""
     rewires = []
 
-    if 'shim_exports' not in canonical_map:
-        return rewires
-
-    shim_exports = canonical_map['shim_exports']
-
     for symbol in symbols:
         if symbol['context'] == 'undefined_symbol':
             symbol_name = symbol['symbol']
 
-            # Look for potential matches in shim exports
-            for shim_name, exports in shim_exports.items():
-                for export in exports:
-                    if symbol_name in export['source_file'] or symbol_name in export['export_path']:
-                        rewires.append({
-                            'symbol': symbol_name,
-                            'current_import': None,  # Would need more analysis
-                            'target_import': export['package_import'],
-                            'rationale': f'Symbol should be imported from {shim_name} shim',
-                            'priority': 'high',
-                            'file': symbol['file']
-                        })
-                        break
+            for provider in shim_index.get(symbol_name, []):
+                rewires.append({
+                    'symbol': symbol_name,
+                    'current_import': None,  # Would need more analysis
+                    'target_import': provider['package_import'],
+                    'rationale': f"Symbol should be imported from {provider['shim']} shim",
+                    'priority': 'high',
+                    'file': symbol['file']
+                })
 
     return rewires
 
@@ -166,71 +289,49 @@ def generate_skeletons(missing_by_feature):
     return skeletons
 
 def main():
+    import argparse
     import sys
 
-    if len(sys.argv) < 4:
-        print("Usage: python extract_missing_contracts.py --analyzer <analyzer_file> [--gen-rewire-plan] [--canonical <canonical_file>] [--out-map <map_file>] [--out-skel <skel_file>] [--out-rewire <rewire_file>]")
-        sys.exit(1)
-
-    analyzer_file = None
-    canonical_file = None
-    out_map = None
-    out_skel = None
-    out_rewire = None
-    gen_rewire = False
-
-    i = 1
-    while i < len(sys.argv):
-        if sys.argv[i] == '--analyzer' and i + 1 < len(sys.argv):
-            analyzer_file = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == '--canonical' and i + 1 < len(sys.argv):
-            canonical_file = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == '--out-map' and i + 1 < len(sys.argv):
-            out_map = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == '--out-skel' and i + 1 < len(sys.argv):
-            out_skel = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == '--out-rewire' and i + 1 < len(sys.argv):
-            out_rewire = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == '--gen-rewire-plan':
-            gen_rewire = True
-            i += 1
-        else:
-            i += 1
-
-    if not analyzer_file:
-        print("Missing analyzer file")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Extract missing contracts from analyzer output and generate plans')
+    parser.add_argument('--analyzer', required=True, help='dart analyze --format=machine output')
+    parser.add_argument('--gen-rewire-plan', action='store_true', help='Generate the import rewire plan (needs --out-rewire)')
+    parser.add_argument('--packages', default=str(ROOT / 'packages'),
+                        help='Packages directory holding the *_shims packages (default: packages/)')
+    parser.add_argument('--jobs', type=int, default=default_jobs(), help='Worker processes for indexing')
+    parser.add_argument('--out-map', help='Missing symbols by feature (JSON)')
+    parser.add_argument('--out-skel', help='Skeleton contracts (JSON)')
+    parser.add_argument('--out-rewire', help='Import rewire plan (JSON)')
+    parser.add_argument('--canonical', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.canonical:
+        print("WARNING: --canonical is deprecated and ignored; the rewire plan is built from the "
+              "shim packages' declarations (see --packages)", file=sys.stderr)
 
     # Parse analyzer errors
-    missing_symbols = parse_analyzer_errors(analyzer_file)
+    missing_symbols = parse_analyzer_errors(args.analyzer)
     categorized = categorize_by_feature(missing_symbols)
 
     # Generate outputs
-    if out_map:
+    if args.out_map:
         result = {
             'total_missing_symbols': len(missing_symbols),
             'categorized_by_feature': categorized,
             'sample_missing': missing_symbols[:20]
         }
-        with open(out_map, 'w', encoding='utf-8') as f:
+        with open(args.out_map, 'w', encoding='utf-8') as f:
             json.dump(result, f, indent=2, ensure_ascii=False)
 
-    if out_skel:
+    if args.out_skel:
         skeletons = generate_skeletons(categorized)
-        with open(out_skel, 'w', encoding='utf-8') as f:
+        with open(args.out_skel, 'w', encoding='utf-8') as f:
             json.dump(skeletons, f, indent=2, ensure_ascii=False)
 
-    if gen_rewire and out_rewire and canonical_file and Path(canonical_file).exists():
-        with open(canonical_file, 'r', encoding='utf-8') as f:
-            canonical_map = json.load(f)
+    if args.gen_rewire_plan and args.out_rewire:
+        shim_index = build_shim_symbol_index(args.packages, args.jobs)
 
-        rewires = generate_rewire_plan(missing_symbols, canonical_map)
-        with open(out_rewire, 'w', encoding='utf-8') as f:
+        rewires = generate_rewire_plan(missing_symbols, shim_index)
+        with open(args.out_rewire, 'w', encoding='utf-8') as f:
             json.dump({
                 'total_rewires_needed': len(rewires),
                 'rewire_plan': rewires,
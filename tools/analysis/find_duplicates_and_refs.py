@@ -3,104 +3,82 @@
 Find duplicate definitions and their references in the codebase.
 """
 import json
-import re
+import os
 from pathlib import Path
 from collections import defaultdict, Counter
 
-def extract_class_definitions(dart_file):
-    """Extract class/interface definitions from a Dart file."""
-    definitions = []
-    try:
-        with open(dart_file, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-
-        # Find class definitions
-        class_pattern = r'(?:class|abstract class|interface)\s+(\w+)'
-        for match in re.finditer(class_pattern, content):
-            class_name = match.group(1)
-            definitions.append({
-                'type': 'class',
-                'name': class_name,
-                'file': str(dart_file),
-                'line': content[:match.start()].count('\n') + 1
-            })
-
-        # Find enum definitions
-        enum_pattern = r'enum\s+(\w+)'
-        for match in re.finditer(enum_pattern, content):
-            enum_name = match.group(1)
-            definitions.append({
-                'type': 'enum',
-                'name': enum_name,
-                'file': str(dart_file),
-                'line': content[:match.start()].count('\n') + 1
-            })
-
-    except Exception as e:
-        print(f"Error reading {dart_file}: {e}")
-
-    return definitions
-
-def find_references(root_dir, definitions):
-    """Find references to the defined symbols."""
-    references = defaultdict(list)
+from dart_index import DartIndex
+from parallel_scan import default_jobs
+
+def extract_class_definitions(record):
+    """Extract class/interface/enum definitions from an indexed Dart file."""
+    return [
+        {
+            'type': decl['kind'],
+            'name': decl['name'],
+            'file': record['path'],
+            'line': decl['line']
+        }
+        for decl in record['declarations']
+        if decl['kind'] in ('class', 'enum')
+    ]
+
+def find_references(index, records, definitions):
+    """Find references to the defined symbols from the index's identifier postings.
+
+    No file is re-read: postings and line contexts were stored when the files
+    were indexed. Declaration lines (`class X` / `enum X`) are skipped in the
+    files that define X.
+    """
+    defined_in = defaultdict(set)
+    for def_info in definitions:
+        defined_in[os.path.abspath(def_info['file'])].add(def_info['name'])
+    names = {os.path.abspath(r['path']): r['path'] for r in records}
 
-    for dart_file in Path(root_dir).rglob('*.dart'):
-        try:
-            with open(dart_file, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-
-            for line_num, line in enumerate(lines, 1):
-                for def_info in definitions:
-                    symbol = def_info['name']
-                    if symbol in line and not line.strip().startswith('//'):
-                        # Check if it's a definition (skip self-references)
-                        if str(dart_file) == def_info['file'] and f'class {symbol}' in line:
-                            continue
-                        if str(dart_file) == def_info['file'] and f'enum {symbol}' in line:
-                            continue
-
-                        references[symbol].append({
-                            'file': str(dart_file),
-                            'line': line_num,
-                            'context': line.strip()[:100]
-                        })
-
-        except Exception as e:
-            print(f"Error reading {dart_file}: {e}")
+    references = defaultdict(list)
+    for symbol, path, line_num, declares, context in index.references({d['name'] for d in definitions}):
+        if path not in names or (declares and symbol in defined_in.get(path, ())):
+            continue
+        references[symbol].append({
+            'file': names[path],
+            'line': line_num,
+            'context': context
+        })
 
     return references
 
-def analyze_duplicates(root_dir):
+def analyze_duplicates(root_dir, jobs=1):
     """Analyze duplicate definitions in the codebase."""
     all_definitions = []
 
-    # Collect all definitions
-    for dart_file in Path(root_dir).rglob('*.dart'):
-        if 'packages/' in str(dart_file):  # Skip packages for now
-            continue
-        all_definitions.extend(extract_class_definitions(dart_file))
-
-    # Group by name
-    name_groups = defaultdict(list)
-    for def_info in all_definitions:
-        name_groups[def_info['name']].append(def_info)
-
-    # Find duplicates (same name, different files)
-    duplicates = {}
-    for name, defs in name_groups.items():
-        if len(defs) > 1:
-            duplicates[name] = {
-                'count': len(defs),
-                'definitions': defs,
-                'references': []
-            }
-
-    # Find references for duplicates
-    if duplicates:
-        references = find_references(root_dir, sum([d['definitions'] for d in duplicates.values()], []))
-        for name in duplicates:
-            duplicates[name]['references'] = references.get(name, [])
+    with DartIndex() as index:
+        records = index.refresh(Path(root_dir).rglob('*.dart'), jobs)
+
+        # Collect all definitions
+        for record in records:
+            if 'packages/' not in record['path']:  # Skip packages for now
+                all_definitions.extend(extract_class_definitions(record))
+
+        # Group by name
+        name_groups = defaultdict(list)
+        for def_info in all_definitions:
+            name_groups[def_info['name']].append(def_info)
+
+        # Find duplicates (same name, different files)
+        duplicates = {}
+        for name, defs in name_groups.items():
+            if len(defs) > 1:
+                duplicates[name] = {
+                    'count': len(defs),
+                    'definitions': defs,
+                    'references': []
+                }
+
+        # Find references for duplicates
+        if duplicates:
+            references = find_references(index, records, [d for dup in duplicates.values() for d in dup['definitions']])
+            for name in duplicates:
+                duplicates[name]['references'] = references.get(name, [])
 
     return duplicates
 
@@ -108,11 +86,12 @@ def main():
     import sys
 
     if len(sys.argv) < 4:
-        print("Usage: python find_duplicates_and_refs.py --root <root_dir> --out <output_file>")
+        print("Usage: python find_duplicates_and_refs.py --root <root_dir> --out <output_file> [--jobs N]")
         sys.exit(1)
 
     root_dir = None
     output_file = None
+    jobs = default_jobs()
 
     i = 1
     while i < len(sys.argv):
@@ -122,6 +101,9 @@ def main():
         elif sys.argv[i] == '--out' and i + 1 < len(sys.argv):
             output_file = sys.argv[i + 1]
             i += 2
+        elif sys.argv[i] == '--jobs' and i + 1 < len(sys.argv):
+            jobs = int(sys.argv[i + 1])
+            i += 2
         else:
             i += 1
 
@@ -129,7 +111,7 @@ def main():
         print("Missing root directory or output file")
         sys.exit(1)
 
-    duplicates = analyze_duplicates(root_dir)
+    duplicates = analyze_duplicates(root_dir, jobs)
 
     result = {
         'total_duplicates': len(duplicates),
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 
-import json, re, sys
+import argparse, json, re, sys
 from pathlib import Path
 
+from dart_index import DartIndex
+from git_scope import add_scope_arguments, changed_files, under
+from parallel_scan import add_jobs_argument
+
 ROOT = Path(__file__).resolve().parents[2]
 APP = ROOT / "app" / "lib"
 
@@ -32,42 +36,65 @@ CANONICAL_MAP = {
 }
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate the canonical imports rewrite plan for app/lib")
+    add_jobs_argument(parser)
+    add_scope_arguments(parser)
+    args = parser.parse_args()
+    changed = changed_files(str(ROOT), args.since, args.staged)
+    output_file = ROOT / "tools" / "reports" / "rewrite_imports_plan.json"
+
     rewrite_plan = {
         "metadata": {
             "description": "Canonical imports rewrite plan for app/lib/**",
             "generated_at": "2025-11-12",
-            "version": "1.0"
+            "version": "1.0",
+            "scope": "full" if changed is None else "changed"
         },
         "rewrites": {}
     }
 
-    for dart_file in APP.rglob("*.dart"):
-        relative_path = dart_file.relative_to(ROOT)
-        content = dart_file.read_text(encoding="utf-8", errors="ignore")
+    # A scoped run updates the existing plan: entries of changed (or deleted)
+    # files are replaced, every other file keeps its entry
+    if changed is not None and output_file.exists():
+        with open(output_file, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        stale = {str(Path(p).relative_to(ROOT)) for p in under(changed, str(APP))}
+        rewrite_plan["metadata"]["scope"] = previous.get("metadata", {}).get("scope", "changed")
+        rewrite_plan["rewrites"] = {
+            path: rewrites for path, rewrites in previous.get("rewrites", {}).items() if path not in stale
+        }
+
+    with DartIndex() as index:
+        if changed is None:
+            records = index.refresh_tree(str(APP), args.jobs)
+        else:
+            records = index.refresh(under(changed, str(APP)), args.jobs)
+
+    for record in records:
+        relative_path = Path(record["path"]).relative_to(ROOT)
 
         file_rewrites = {}
-        for line_num, line in enumerate(content.splitlines(), 1):
-            # Find import statements
-            import_match = re.match(r'^\s*import\s+["\']([^"\']+)["\']\s*;', line)
-            if import_match:
-                import_uri = import_match.group(1)
-
-                # Check if this import needs rewriting
-                for pattern, canonical in CANONICAL_MAP.items():
-                    if re.match(pattern, import_uri):
-                        if import_uri != canonical:
-                            file_rewrites[str(line_num)] = {
-                                "from": import_uri,
-                                "to": canonical,
-                                "line": line.strip()
-                            }
-                        break
+        for imp in record["imports"]:
+            # Only plain `import '...';` statements are rewritten
+            if imp["combinators"]:
+                continue
+            import_uri = imp["uri"]
+
+            # Check if this import needs rewriting
+            for pattern, canonical in CANONICAL_MAP.items():
+                if re.match(pattern, import_uri):
+                    if import_uri != canonical:
+                        file_rewrites[str(imp["line"])] = {
+                            "from": import_uri,
+                            "to": canonical,
+                            "line": imp["text"]
+                        }
+                    break
 
         if file_rewrites:
             rewrite_plan["rewrites"][str(relative_path)] = file_rewrites
 
     # Save the plan
-    output_file = ROOT / "tools" / "reports" / "rewrite_imports_plan.json"
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(rewrite_plan, f, indent=2, ensure_ascii=False)
 
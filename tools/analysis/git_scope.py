@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Git-aware scoping for the tools/analysis checks.
+
+Adds --since REV / --staged to a tool and turns them into the list of
+changed files from `git diff --name-only` (plus untracked files for
+--since), so pre-commit runs only look at what the diff touched.
+"""
+
+import os
+import subprocess
+from typing import List, Optional
+
+def add_scope_arguments(parser) -> None:
+    """Add the shared --since / --staged options to an argparse parser."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--since', metavar='REV', help='Only analyze files changed since REV (committed or not)')
+    group.add_argument('--staged', action='store_true', help='Only analyze files staged for commit')
+
+def changed_files(base_path: str, since: Optional[str] = None, staged: bool = False) -> Optional[List[str]]:
+    """Absolute paths of files under base_path changed since REV or staged.
+
+    Deleted files are included so callers can drop them from caches. With
+    since, untracked (not ignored) files count as changed too, since a brand
+    new file never shows up in git diff.
+    Returns None when neither since nor staged is set (full scan).
+    """
+    if not since and not staged:
+        return None
+
+    cmd = ['git', '-C', base_path, 'diff', '--name-only', '--relative', '--no-renames']
+    cmd.append('--cached' if staged else since)
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    names = result.stdout.splitlines()
+    if not staged:
+        untracked = subprocess.run(['git', '-C', base_path, 'ls-files', '--others', '--exclude-standard'],
+                                   capture_output=True, text=True, check=True)
+        names += untracked.stdout.splitlines()
+    return [os.path.join(os.path.abspath(base_path), line) for line in names if line]
+
+def under(paths: List[str], directory: str, suffix: str = '.dart') -> List[str]:
+    """Filter absolute paths to files with suffix inside directory."""
+    prefix = os.path.abspath(directory) + os.sep
+    return [p for p in paths if p.startswith(prefix) and p.endswith(suffix)]
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Process-pool scanning layer shared by the tools/analysis scanners.
+
+Scanners hand a list of work items (usually file paths) and a module-level
+worker function to scan_files(); workers read and parse files themselves and
+return compact results, so file contents never cross process boundaries.
+"""
+
+import os
+from multiprocessing import Pool
+from typing import Any, Callable, List, Sequence
+
+# Below this many items per worker, pool start-up costs more than it saves.
+MIN_ITEMS_PER_JOB = 16
+
+def default_jobs() -> int:
+    """Default worker count: one per CPU."""
+    return os.cpu_count() or 1
+
+def add_jobs_argument(parser) -> None:
+    """Add the shared --jobs option to an argparse parser."""
+    parser.add_argument('--jobs', type=int, default=default_jobs(),
+                        help='Parallel worker processes (default: CPU count, 1 disables the pool)')
+
+def scan_files(items: Sequence[Any], worker: Callable[[Any], Any], jobs: int = 1) -> List[Any]:
+    """Apply worker to every item, in order, across up to ``jobs`` processes.
+
+    ``worker`` must be a module-level function so it can be pickled.
+    """
+    items = list(items)
+    jobs = min(jobs, len(items) // MIN_ITEMS_PER_JOB)
+    if jobs <= 1:
+        return [worker(item) for item in items]
+
+    chunksize = max(1, len(items) // (jobs * 4))
+    with Pool(processes=jobs) as pool:
+        return pool.map(worker, items, chunksize=chunksize)
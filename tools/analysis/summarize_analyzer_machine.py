@@ -7,32 +7,95 @@ import sys
 from collections import Counter, defaultdict
 from pathlib import Path
 
-def parse_analyzer_line(line):
-    """Parse a single line from analyzer machine output."""
-    try:
-        parts = line.strip().split('|')
-        if len(parts) < 4:
-            return None
-
-        severity = parts[0]
-        error_type = parts[1]
-        file_path = parts[2]
-        line_num = parts[3]
-        message = '|'.join(parts[4:]) if len(parts) > 4 else ""
+from analyzer_output import iter_rows
+
+EXAMPLES_PER_TYPE = 3
+SAMPLE_SIZE = 10
+
+def to_error(row):
+    """Report shape of one analyzer row; 'type' is the specific error code."""
+    return {
+        'severity': row['severity'],
+        'type': row['code'],
+        'file': row['file'],
+        'line': row['line'],
+        'message': row['message']
+    }
+
+def _example(error):
+    message = error['message']
+    return {
+        'file': error['file'],
+        'line': error['line'],
+        'message': message[:100] + '...' if len(message) > 100 else message
+    }
 
+def _lib_dir(file_path):
+    """Top-level directory under lib/ for a file, 'root' for files directly in lib/, else None."""
+    if '/lib/' not in file_path:
+        return None
+    rest = file_path.split('/lib/')[1]
+    return rest.split('/')[0] if '/' in rest else 'root'
+
+class AnalyzerSummary:
+    """Single-pass aggregation of parsed analyzer errors with bounded state.
+
+    Only counters, the first EXAMPLES_PER_TYPE errors per type and the first
+    SAMPLE_SIZE errors overall are kept, so memory does not grow with input size.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.error_types = Counter()
+        self.severity_count = Counter()
+        self.examples = defaultdict(list)
+        self.dir_types = defaultdict(Counter)
+        self.samples = []
+
+    def add(self, error):
+        self.total += 1
+        error_type = error['type']
+        self.error_types[error_type] += 1
+        self.severity_count[error['severity']] += 1
+
+        examples = self.examples[error_type]
+        if len(examples) < EXAMPLES_PER_TYPE:
+            examples.append(_example(error))
+        if len(self.samples) < SAMPLE_SIZE:
+            self.samples.append(error)
+
+        dir_part = _lib_dir(error['file'])
+        if dir_part is not None:
+            self.dir_types[dir_part][error_type] += 1
+
+    def result(self):
         return {
-            'severity': severity,
-            'type': error_type,
-            'file': file_path,
-            'line': int(line_num) if line_num.isdigit() else 0,
-            'message': message
+            'total_errors': self.total,
+            'severity_distribution': dict(self.severity_count),
+            'top_10_errors': [
+                {'type': error_type, 'count': count, 'examples': self.examples[error_type]}
+                for error_type, count in self.error_types.most_common(10)
+            ],
+            'directory_distribution': {
+                dir_name: {
+                    'total_errors': sum(types.values()),
+                    'error_types': dict(types)
+                }
+                for dir_name, types in self.dir_types.items()
+            },
+            'sample_errors': self.samples  # First 10 for reference
         }
-    except:
-        return None
+
+def summarize_rows(rows):
+    """Aggregate an iterable of analyzer rows (see analyzer_output.AnalyzerOutput.row)."""
+    summary = AnalyzerSummary()
+    for row in rows:
+        summary.add(to_error(row))
+    return summary.result()
 
 def main():
     if len(sys.argv) < 4:
-        print("Usage: python summarize_analyzer_machine.py --in <input_file> --out <output_file>")
+        print("Usage: python summarize_analyzer_machine.py --in <input_file|-> --out <output_file>")
         sys.exit(1)
 
     input_file = None
@@ -53,69 +116,20 @@ def main():
         print("Missing input or output file")
         sys.exit(1)
 
-    # Read analyzer output
-    errors = []
-    if Path(input_file).exists():
+    # Stream analyzer output ('-' reads stdin, e.g. piped from dart analyze --format=machine)
+    if input_file == '-':
+        sys.stdin.reconfigure(encoding='utf-8', errors='ignore')
+        result = summarize_rows(iter_rows(sys.stdin))
+    elif Path(input_file).exists():
         with open(input_file, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                if line.strip():
-                    parsed = parse_analyzer_line(line)
-                    if parsed:
-                        errors.append(parsed)
-
-    # Analyze errors
-    error_types = Counter(e['type'] for e in errors)
-    severity_count = Counter(e['severity'] for e in errors)
-
-    # Group by directory/feature
-    dir_errors = defaultdict(list)
-    for error in errors:
-        file_path = error['file']
-        if '/lib/' in file_path:
-            parts = file_path.split('/lib/')
-            if len(parts) > 1:
-                dir_part = parts[1].split('/')[0] if '/' in parts[1] else 'root'
-                dir_errors[dir_part].append(error)
-
-    # Top 10 error types
-    top_errors = [
-        {'type': error_type, 'count': count, 'examples': []}
-        for error_type, count in error_types.most_common(10)
-    ]
-
-    # Add examples for top errors
-    for error_info in top_errors:
-        examples = [e for e in errors if e['type'] == error_info['type']][:3]
-        error_info['examples'] = [
-            {
-                'file': e['file'],
-                'line': e['line'],
-                'message': e['message'][:100] + '...' if len(e['message']) > 100 else e['message']
-            }
-            for e in examples
-        ]
-
-    # Directory distribution
-    dir_summary = {}
-    for dir_name, dir_errs in dir_errors.items():
-        dir_summary[dir_name] = {
-            'total_errors': len(dir_errs),
-            'error_types': dict(Counter(e['type'] for e in dir_errs))
-        }
-
-    # Output JSON
-    result = {
-        'total_errors': len(errors),
-        'severity_distribution': dict(severity_count),
-        'top_10_errors': top_errors,
-        'directory_distribution': dir_summary,
-        'sample_errors': errors[:10]  # First 10 for reference
-    }
+            result = summarize_rows(iter_rows(f))
+    else:
+        result = summarize_rows([])
 
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(result, f, indent=2, ensure_ascii=False)
 
-    print(f"Analysis complete. Found {len(errors)} errors.")
+    print(f"Analysis complete. Found {result['total_errors']} errors.")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
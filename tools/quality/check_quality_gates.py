@@ -11,15 +11,18 @@ import json
 import sys
 import argparse
 import os
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
 class QualityGateChecker:
-    def __init__(self, gates_config: Dict[str, Any]):
+    def __init__(self, gates_config: Dict[str, Any], version_code: Optional[int] = None):
         self.config = gates_config
+        self.version_code = version_code
         self.thresholds = gates_config["thresholds"]
         self.violations: List[Dict[str, Any]] = []
         self.metrics: Dict[str, Any] = {}
+        self.windows: Dict[str, Any] = {}
+        self.notes: List[str] = []
 
     def load_metrics(self) -> bool:
         """Load all required metrics files."""
@@ -76,6 +79,21 @@ class QualityGateChecker:
             })
             return False
 
+    def fetch_metrics(self, version_code: int, package: str, app_id: str, history_dir: str = None) -> bool:
+        """Refresh the provider metrics files with one concurrent fetch of all providers."""
+        from metrics_collector import collect_metrics
+
+        outcomes = collect_metrics(version_code, package, app_id, self.config["window_days"], history_dir=history_dir)
+        failed = {name: outcome["error"] for name, outcome in outcomes.items() if "error" in outcome}
+        for name, error in failed.items():
+            self.violations.append({
+                "type": "data_error",
+                "gate": name,
+                "message": f"Failed to fetch {name} metrics: {error}",
+                "severity": "critical"
+            })
+        return not failed
+
     def check_crash_free_sessions(self) -> bool:
         """Check crash-free sessions threshold."""
         actual = self.metrics.get("crash_free_sessions_pct", 0)
@@ -127,23 +145,80 @@ class QualityGateChecker:
             return False
         return True
 
+    def load_startup_phases(self) -> Dict[str, Any]:
+        """Per-phase breakdown from startup_phases.py, if it was run for the build being gated."""
+        phases_file = "tools/reports/PQG_startup_phases.json"
+        if not os.path.exists(phases_file):
+            return {}
+        with open(phases_file, 'r') as f:
+            phases = json.load(f)
+        if self.version_code is not None and phases.get("current_version") != self.version_code:
+            self.notes.append(f"Ignored {phases_file}: it was built for version {phases.get('current_version')}, "
+                              f"not {self.version_code}")
+            return {}
+        return phases
+
     def check_cold_start_regression(self) -> bool:
-        """Check cold start regression threshold."""
-        actual = abs(self.metrics.get("cold_start_regression_pct", float('inf')))
+        """Check cold start regression threshold (one-sided: a faster start never fails)."""
+        actual = self.metrics.get("cold_start_regression_pct", float('inf'))
         threshold = self.thresholds["cold_start_regression_pct_max"]
 
         if actual > threshold:
+            message = f"Cold start regression {actual}% exceeds threshold {threshold}%"
+            phases = self.load_startup_phases()
+            if phases.get("top_regressed_phase"):
+                message += (f" (slowest phase: {phases['top_regressed_phase']}; "
+                            f"regressed: {', '.join(phases['regressed_phases'])})")
             self.violations.append({
                 "type": "quality_gate_failure",
                 "gate": "cold_start_regression",
                 "threshold": threshold,
                 "actual": actual,
-                "message": f"Cold start regression {actual}% exceeds threshold {threshold}%",
+                "message": message,
                 "severity": "medium"
             })
             return False
         return True
 
+    def check_history_windows(self, history_dir: str, version_code: int) -> bool:
+        """Check every threshold over the rolling windows of the metrics history.
+
+        Windows are window_days plus each rollout phase's monitoring window.
+        A window fails on its mean, or when the metric's trend projects past
+        the threshold within one more window.
+        """
+        from metrics_history import evaluate_windows, gate_windows, load_history
+
+        columns = load_history(history_dir, version_code)
+        self.windows = evaluate_windows(columns, self.thresholds, gate_windows(self.config))
+
+        all_passed = True
+        for label, metrics in self.windows.items():
+            for metric, window in metrics.items():
+                if not window["ok"]:
+                    self.violations.append({
+                        "type": "window_gate_failure",
+                        "gate": f"{metric}@{label}",
+                        "threshold": window["limit"],
+                        "actual": window["mean"],
+                        "message": f"{metric} averaged {window['mean']} over {window['window_hours']:g}h "
+                                   f"({window['samples']} samples), {window['bound']} {window['limit']}",
+                        "severity": "high"
+                    })
+                    all_passed = False
+                elif not window["trend_ok"]:
+                    self.violations.append({
+                        "type": "trend_gate_failure",
+                        "gate": f"{metric}@{label}",
+                        "threshold": window["limit"],
+                        "actual": window["projected"],
+                        "message": f"{metric} trending {window['slope_per_day']:+}/day, projected "
+                                   f"{window['projected']} within {window['window_hours']:g}h, {window['bound']} {window['limit']}",
+                        "severity": "medium"
+                    })
+                    all_passed = False
+        return all_passed
+
     def run_all_checks(self) -> bool:
         """Run all quality gate checks."""
         checks = [
@@ -170,6 +245,8 @@ class QualityGateChecker:
             "ok": ok,
             "violations": self.violations,
             "metrics": self.metrics,
+            "windows": self.windows,
+            "notes": self.notes,
             "checked_at": datetime.utcnow().isoformat() + "Z",
             "gates_config": {
                 "window_days": self.config["window_days"],
@@ -194,9 +271,23 @@ class QualityGateChecker:
             f"| Crash-free Sessions | ≥{self.thresholds['crash_free_sessions_pct_min']}% | {self.metrics.get('crash_free_sessions_pct', 'N/A')}% | {'✅' if self.metrics.get('crash_free_sessions_pct', 0) >= self.thresholds['crash_free_sessions_pct_min'] else '❌'} |",
             f"| ANR Rate | ≤{self.thresholds['anr_rate_pct_max']}% | {self.metrics.get('anr_rate_pct', 'N/A')}% | {'✅' if self.metrics.get('anr_rate_pct', float('inf')) <= self.thresholds['anr_rate_pct_max'] else '❌'} |",
             f"| Fatal Crash Rate | ≤{self.thresholds['fatal_rate_pct_max']}% | {self.metrics.get('fatal_rate_pct', 'N/A')}% | {'✅' if self.metrics.get('fatal_rate_pct', float('inf')) <= self.thresholds['fatal_rate_pct_max'] else '❌'} |",
-            f"| Cold Start Regression | ≤{self.thresholds['cold_start_regression_pct_max']}% | {abs(self.metrics.get('cold_start_regression_pct', 0))}% | {'✅' if abs(self.metrics.get('cold_start_regression_pct', 0)) <= self.thresholds['cold_start_regression_pct_max'] else '❌'} |",
+            f"| Cold Start Regression | ≤{self.thresholds['cold_start_regression_pct_max']}% | {self.metrics.get('cold_start_regression_pct', 'N/A')}% | {'✅' if self.metrics.get('cold_start_regression_pct', float('inf')) <= self.thresholds['cold_start_regression_pct_max'] else '❌'} |",
         ]
 
+        if self.windows:
+            summary_lines.extend([
+                "\n## Rolling Windows\n",
+                "| Window | Metric | Samples | Mean | Trend/day | Projected | Status |",
+                "|--------|--------|---------|------|-----------|-----------|--------|",
+            ])
+            for label, metrics in self.windows.items():
+                for metric, window in metrics.items():
+                    status = '✅' if window['ok'] and window['trend_ok'] else ('❌' if not window['ok'] else '⚠️')
+                    summary_lines.append(
+                        f"| {label} ({window['window_hours']:g}h) | {metric} | {window['samples']} | {window['mean']} | "
+                        f"{window['slope_per_day']:+} | {window['projected']} | {status} |"
+                    )
+
         if self.violations:
             summary_lines.extend([
                 "\n## Violations\n",
@@ -205,6 +296,10 @@ class QualityGateChecker:
             for violation in self.violations:
                 summary_lines.append(f"- **{violation['gate']}**: {violation['message']}")
 
+        if self.notes:
+            summary_lines.append("\n## Notes\n")
+            summary_lines.extend(f"- {note}" for note in self.notes)
+
         summary_lines.extend([
             "\n## Recommendations\n",
             "✅ **PASS**: Proceed with rollout expansion" if ok else "❌ **FAIL**: Stop rollout and investigate violations",
@@ -217,8 +312,16 @@ class QualityGateChecker:
 def main():
     parser = argparse.ArgumentParser(description="Check quality gates for production rollout")
     parser.add_argument("--versionCode", type=int, required=True, help="App version code to check")
+    parser.add_argument("--history", type=str,
+                        help="Metrics history directory; also gate on rolling windows and trends (requires numpy)")
+    parser.add_argument("--fetch", action="store_true",
+                        help="Fetch Play and Crashlytics metrics concurrently (metrics_collector.py) before checking")
+    parser.add_argument("--package", type=str, help="Android package name for --fetch")
+    parser.add_argument("--app", type=str, help="Firebase app ID for --fetch")
 
     args = parser.parse_args()
+    if args.fetch and not (args.package and args.app):
+        parser.error("--fetch requires --package and --app")
 
     try:
         # Load quality gates configuration
@@ -226,7 +329,13 @@ def main():
             gates_config = json.load(f)
 
         # Initialize checker
-        checker = QualityGateChecker(gates_config)
+        checker = QualityGateChecker(gates_config, args.versionCode)
+
+        # Fetch fresh provider metrics in one concurrent round trip
+        if args.fetch and not checker.fetch_metrics(args.versionCode, args.package, args.app, args.history):
+            print("❌ Failed to fetch required metrics", file=sys.stderr)
+            checker.generate_reports(args.versionCode)
+            sys.exit(1)
 
         # Load metrics
         if not checker.load_metrics():
@@ -236,6 +345,8 @@ def main():
 
         # Run checks
         ok = checker.run_all_checks()
+        if args.history and not checker.check_history_windows(args.history, args.versionCode):
+            ok = False
 
         # Generate reports
         checker.generate_reports(args.versionCode)
@@ -250,6 +361,9 @@ def main():
             for violation in checker.violations:
                 print(f"  - {violation['gate']}: {violation['message']}")
 
+        for note in checker.notes:
+            print(f"Note: {note}")
+
         # Exit with appropriate code
         sys.exit(0 if ok else 1)
 
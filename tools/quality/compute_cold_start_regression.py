@@ -11,14 +11,80 @@ import json
 import sys
 import argparse
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional
 from datetime import datetime
 
-def load_baseline_metrics(baseline_type: str, current_version: int) -> Optional[Dict[str, Any]]:
+from quantile_sketch import KLLSketch, load_sketch, save_sketch, stored_versions
+
+DEFAULT_SKETCH_DIR = "tools/reports/PQG_startup_sketches"
+PERCENTILES = {"p50": 0.50, "p90": 0.90, "p95": 0.95}
+
+def read_startup_samples(paths: Iterable[str], field: str) -> KLLSketch:
+    """Stream cold-start durations from NDJSON traces ('-' for stdin) into one merged sketch.
+
+    Each file is sketched separately and merged, as shards from different
+    devices or CI runs would be.
+    """
+    merged = KLLSketch()
+    for path in paths:
+        shard = KLLSketch()
+        f = sys.stdin if path == "-" else open(path, 'r')
+        try:
+            batch = []
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                value = json.loads(line).get(field)
+                if isinstance(value, (int, float)):
+                    batch.append(value)
+                    if len(batch) >= 10000:
+                        shard.extend(batch)
+                        batch = []
+            shard.extend(batch)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+        merged.merge(shard)
+    return merged
+
+def sketch_metrics(sketch: KLLSketch) -> Dict[str, Any]:
+    """cold_start_pNN_ms values of a sketch, as reported by the Play provider."""
+    values = sketch.quantiles(PERCENTILES.values())
+    return {f"cold_start_{name}_ms": int(round(value)) for name, value in zip(PERCENTILES, values)}
+
+def previous_sketch_version(sketch_dir: str, current_version: int) -> Optional[int]:
+    """Newest version code older than current_version with a stored sketch."""
+    older = [v for v in stored_versions(sketch_dir) if v < current_version]
+    return older[-1] if older else None
+
+def load_regression_threshold(gates_file: str) -> float:
+    """cold_start_regression_pct_max from the quality gates config (15% if unavailable)."""
+    try:
+        with open(gates_file, 'r') as f:
+            return float(json.load(f)["thresholds"]["cold_start_regression_pct_max"])
+    except (OSError, KeyError, ValueError):
+        return 15.0
+
+def load_baseline_metrics(baseline_type: str, current_version: int,
+                          sketch_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
     Load baseline metrics for comparison.
-    In production, this would query historical data from a database or API.
+
+    For last_rc, the newest stored sample sketch of an older version code is
+    used when sketch_dir has one; otherwise the simulated baselines apply.
     """
+    if baseline_type == "last_rc" and sketch_dir:
+        version = previous_sketch_version(sketch_dir, current_version)
+        if version is not None:
+            sketch = load_sketch(sketch_dir, version)
+            return dict(
+                version_code=version,
+                source=f"Startup sample sketch ({sketch.n} samples)",
+                sample_count=sketch.n,
+                **sketch_metrics(sketch)
+            )
+
     # Simulate baseline data based on type
     baselines = {
         "last_rc": {
@@ -49,7 +115,7 @@ def load_baseline_metrics(baseline_type: str, current_version: int) -> Optional[
 
     return baselines.get(baseline_type)
 
-def compute_regression(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+def compute_regression(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 15.0) -> Dict[str, Any]:
     """
     Compute regression percentages for cold start metrics.
     """
@@ -69,7 +135,7 @@ def compute_regression(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dic
                     "current_ms": current_value,
                     "baseline_ms": baseline_value,
                     "regression_pct": round(regression_pct, 2),
-                    "acceptable": abs(regression_pct) <= 15.0  # Using threshold from config
+                    "acceptable": regression_pct <= threshold
                 }
 
     # Overall assessment based on P95 (worst case)
@@ -78,16 +144,53 @@ def compute_regression(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dic
                            regressions.get("p90", {}).get("regression_pct", 0),
                            p95_regression)
 
-    return {
+    result = {
         "current_version": current.get("version_code"),
         "baseline_version": baseline.get("version_code"),
         "baseline_source": baseline.get("source"),
         "comparison_timestamp": datetime.utcnow().isoformat() + "Z",
         "regressions": regressions,
         "overall_regression_pct": round(overall_regression, 2),
-        "passes_threshold": abs(overall_regression) <= 15.0,
-        "recommendation": "ACCEPT" if abs(overall_regression) <= 15.0 else "REVIEW"
+        "threshold_pct": threshold,
+        "passes_threshold": overall_regression <= threshold,
+        "recommendation": "ACCEPT" if overall_regression <= threshold else "REVIEW"
+    }
+    if "sample_count" in current:
+        result["current_samples"] = current["sample_count"]
+    if "sample_count" in baseline:
+        result["baseline_samples"] = baseline["sample_count"]
+    return result
+
+def apply_statistical_gate(result: Dict[str, Any], baseline: KLLSketch, candidate: KLLSketch,
+                           threshold: float, resamples: int, confidence: float) -> Dict[str, Any]:
+    """Gate on the lower confidence bound of each percentile's regression.
+
+    A percentile only counts as regressed when even the optimistic end of its
+    bootstrap interval exceeds the threshold, so small or noisy sample sets
+    do not block a release on chance alone.
+    """
+    from regression_stats import bootstrap_regression, mann_whitney
+
+    intervals = bootstrap_regression(baseline, candidate, PERCENTILES, resamples, confidence)
+    for percentile, interval in intervals.items():
+        interval["acceptable"] = interval["ci_low_pct"] <= threshold
+        result["regressions"][percentile] = interval
+
+    lower_bound = max(interval["ci_low_pct"] for interval in intervals.values())
+    result["overall_regression_point_pct"] = result["overall_regression_pct"]
+    result["regression_ci_low_pct"] = round(lower_bound, 2)
+    # The regression we are confident of: a negative lower bound (a likely
+    # speedup) is no regression at all, not a large one in the other direction
+    result["overall_regression_pct"] = round(max(0.0, lower_bound), 2)
+    result["passes_threshold"] = lower_bound <= threshold
+    result["recommendation"] = "ACCEPT" if result["passes_threshold"] else "REVIEW"
+    result["statistics"] = {
+        "gate": "ci_lower_bound",
+        "confidence": confidence,
+        "bootstrap_resamples": resamples,
+        "mann_whitney": mann_whitney(baseline, candidate)
     }
+    return result
 
 def main():
     parser = argparse.ArgumentParser(description="Compute cold start regression for quality gates")
@@ -96,28 +199,71 @@ def main():
                        help="Baseline for comparison")
     parser.add_argument("--versionCode", type=int, required=True,
                        help="Current app version code")
+    parser.add_argument("--samples", nargs="+", metavar="NDJSON",
+                       help="Raw startup traces (one JSON object per line, - for stdin) instead of Play percentiles")
+    parser.add_argument("--field", type=str, default="cold_start_ms",
+                       help="Field holding the cold start duration in each trace (default: cold_start_ms)")
+    parser.add_argument("--sketch-dir", type=str, default=DEFAULT_SKETCH_DIR,
+                       help=f"Per-version sample sketches used as baselines (default: {DEFAULT_SKETCH_DIR})")
+    parser.add_argument("--record-baseline", action="store_true",
+                       help="Merge this run's --samples into the stored sketch for --versionCode")
+    parser.add_argument("--stat-test", action="store_true",
+                       help="Bootstrap CIs + Mann-Whitney against the baseline sketch; gate on the CI lower bound (requires numpy)")
+    parser.add_argument("--resamples", type=int, default=10000, help="Bootstrap resamples for --stat-test (default: 10000)")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level for --stat-test (default: 0.95)")
+    parser.add_argument("--gates", type=str, default="tools/quality/quality_gates.json",
+                       help="Quality gates config providing cold_start_regression_pct_max")
+    parser.add_argument("--history", type=str,
+                       help="Also append the overall regression to this metrics history directory (requires numpy)")
 
     args = parser.parse_args()
+    if args.stat_test and not args.samples:
+        parser.error("--stat-test requires --samples")
 
     try:
-        # Load current metrics from Play Vitals
-        play_metrics_file = "tools/reports/PQG_play_metrics.json"
-        if not os.path.exists(play_metrics_file):
-            print(f"ERROR: Play metrics file not found: {play_metrics_file}", file=sys.stderr)
-            print("Run play_reporting.py first", file=sys.stderr)
-            sys.exit(1)
+        if args.samples:
+            # Current percentiles from raw startup traces
+            sketch = read_startup_samples(args.samples, args.field)
+            if sketch.n == 0:
+                print(f"ERROR: No '{args.field}' samples found in {', '.join(args.samples)}", file=sys.stderr)
+                sys.exit(1)
+            current_metrics = {
+                "version_code": args.versionCode,
+                "metrics": sketch_metrics(sketch),
+                "sample_count": sketch.n
+            }
+            if args.record_baseline:
+                stored = load_sketch(args.sketch_dir, args.versionCode)
+                path = save_sketch(args.sketch_dir, args.versionCode, stored.merge(sketch) if stored else sketch)
+                print(f"📦 Startup sketch for {args.versionCode} saved to {path}")
+        else:
+            # Load current metrics from Play Vitals
+            play_metrics_file = "tools/reports/PQG_play_metrics.json"
+            if not os.path.exists(play_metrics_file):
+                print(f"ERROR: Play metrics file not found: {play_metrics_file}", file=sys.stderr)
+                print("Run play_reporting.py first", file=sys.stderr)
+                sys.exit(1)
 
-        with open(play_metrics_file, 'r') as f:
-            current_metrics = json.load(f)
+            with open(play_metrics_file, 'r') as f:
+                current_metrics = json.load(f)
 
         # Load baseline metrics
-        baseline_metrics = load_baseline_metrics(args.baseline, args.versionCode)
+        baseline_metrics = load_baseline_metrics(args.baseline, args.versionCode, args.sketch_dir)
         if not baseline_metrics:
             print(f"ERROR: Unknown baseline type: {args.baseline}", file=sys.stderr)
             sys.exit(1)
 
         # Compute regression
-        result = compute_regression(current_metrics, baseline_metrics)
+        threshold = load_regression_threshold(args.gates)
+        result = compute_regression(current_metrics, baseline_metrics, threshold)
+
+        if args.stat_test:
+            baseline_version = previous_sketch_version(args.sketch_dir, args.versionCode)
+            if args.baseline != "last_rc" or baseline_version is None:
+                print("ERROR: --stat-test needs a last_rc baseline with a stored sample sketch", file=sys.stderr)
+                sys.exit(1)
+            result = apply_statistical_gate(result, load_sketch(args.sketch_dir, baseline_version), sketch,
+                                            threshold, args.resamples, args.confidence)
 
         # Write to output file
         output_file = "tools/reports/PQG_startup_regression.json"
@@ -126,6 +272,12 @@ def main():
         with open(output_file, 'w') as f:
             json.dump(result, f, indent=2)
 
+        if args.history:
+            from metrics_history import record_history
+            record_history(args.history, args.versionCode, {
+                "cold_start_regression_pct": result["overall_regression_pct"]
+            })
+
         print(f"✅ Cold start regression computed and saved to {output_file}")
         print(f"📊 Overall Regression: {result['overall_regression_pct']}%")
         print(f"📊 Status: {'PASS' if result['passes_threshold'] else 'FAIL'}")
@@ -135,7 +287,8 @@ def main():
         print("\n📈 Regression Breakdown:")
         for percentile, data in result['regressions'].items():
             status = "✅" if data['acceptable'] else "❌"
-            print(f"  {percentile.upper()}: {data['regression_pct']}% ({status})")
+            interval = f" [{data['ci_low_pct']}%, {data['ci_high_pct']}%]" if "ci_low_pct" in data else ""
+            print(f"  {percentile.upper()}: {data['regression_pct']}%{interval} ({status})")
 
     except Exception as e:
         print(f"ERROR: Failed to compute cold start regression: {e}", file=sys.stderr)
@@ -3,22 +3,73 @@
 DSR Audit Leak Check Script
 Validates DSR audit logs for PII leakage and proper event sequences.
 
-Usage: python3 dsr_audit_leak_check.py [audit_log_file]
+Usage: python3 dsr_audit_leak_check.py [audit_log_file] [--jobs N] [--checkpoint FILE]
+       [--closed-retention-days N] [--rules FILE]
 
 Reads JSONL audit log and checks for:
 1. No PII leakage (emails, phones, names, sensitive URIs)
 2. Proper event sequences for each request
-3. Required confirmation for erasure requests
+3. Required actions per request type (e.g. confirmation for erasure requests)
+
+Statuses, transitions, aliases, required fields and required actions come
+from dsr_audit_rules.json (see dsr_audit_rules.py), so new request types
+need no code change.
+
+The log is read once: per-event checks run as each line is parsed, and the
+fields needed for sequence checks are hash-partitioned by request_id into
+temporary shard files, so each request's events can be checked one shard at
+a time with memory bounded by shard size rather than log size. With --jobs,
+newline-aligned byte ranges of the log are checked in a process pool.
+
+Audit logs are append-only, so with --checkpoint a passing run records how
+far it got (byte offset, line number, a hash of the bytes just before the
+offset) and the state of every open request (last status, request type,
+required actions seen so far). The next run verifies the hash, validates only
+the lines appended since, and continues each open request's state machine
+across the boundary. A rotated or truncated log is validated from the start.
+Closed requests are kept too, so late events for them are still checked, but
+only for --closed-retention-days after their last event (counted back from
+the newest closed request) to keep the checkpoint from growing forever.
 
 Exits with code 0 on success, 1 on failure.
 """
 
 import json
+import os
 import sys
 import re
+import tempfile
+import zlib
+import argparse
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from multiprocessing import Pool
+from operator import itemgetter
+from urllib.parse import urlparse, parse_qs
 from pathlib import Path
 from collections import defaultdict
-from typing import List, Dict, Set
+from typing import Any, List, Dict, Optional, Set, Tuple
+
+from dsr_audit_rules import DEFAULT_RULES_PATH, load_rules
+
+# Log bytes per request_id partition; each partition's sequence records are
+# loaded together when checking event sequences.
+PARTITION_BYTES = 128 * 1024 * 1024
+# Byte ranges smaller than this are not worth a worker process.
+MIN_CHUNK_BYTES = 8 * 1024 * 1024
+READ_BLOCK = 1024 * 1024
+CHECKPOINT_VERSION = 4
+# Bytes before the checkpoint offset whose hash must still match on resume.
+CHECKPOINT_TAIL_BYTES = 64 * 1024
+# Closed requests stay in the checkpoint this long after their last event.
+CLOSED_RETENTION_DAYS = 90
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Cheap necessary conditions for the phone and name patterns; strings only go
+# through the combined scanner for the PII kinds they can possibly contain.
+PHONE_HINT = re.compile(r'\d{4}\b')
+NAME_HINT = re.compile(r'[a-z]\s+[A-Z]')
 
 
 class DsrAuditLeakChecker:
@@ -37,11 +88,24 @@ class DsrAuditLeakChecker:
         'password', 'token', 'secret', 'key', 'auth', 'api_key', 'session',
         'bearer', 'authorization', 'credentials'
     }
+    # Matches any parameter name containing one of SENSITIVE_PARAMS
+    SENSITIVE_PARAM_RE = re.compile('|'.join(map(re.escape, sorted(SENSITIVE_PARAMS))))
 
-    def __init__(self, audit_log_path: str):
+    PII_MESSAGES = {'email': "Email", 'phone': "Phone", 'name': "Name"}
+
+    def __init__(self, audit_log_path: str, rules_path: str = DEFAULT_RULES_PATH):
         self.audit_log_path = Path(audit_log_path)
+        self.rules_path = rules_path
+        self.rules = load_rules(rules_path)
         self.errors: List[str] = []
         self.warnings: List[str] = []
+        # request_id -> [last status, request_type, bitmask of required actions seen] for open requests
+        self.open_requests: Dict[Any, List] = {}
+        # request_id -> (terminal status, request_type, last event ts) for closed requests,
+        # kept in incremental runs so later events for them are checked as a full run would
+        self.closed_requests: Dict[Any, Tuple[str, Any, int]] = {}
+        # Incremental runs treat the log as live: an open request may still get its required actions
+        self.incremental = False
 
     def check_file_exists(self) -> bool:
         """Check if audit log file exists."""
@@ -50,198 +114,322 @@ class DsrAuditLeakChecker:
             return False
         return True
 
-    def load_audit_events(self) -> List[Dict]:
-        """Load and parse audit events from JSONL file."""
-        events = []
+    def check_range(self, start: int, end: int, first_line: int,
+                    shard_dir: str, shard_tag: str, partitions: int) -> Tuple[int, int]:
+        """Check the events in bytes [start, end) of the log, the first of which is on first_line.
+
+        Per-event checks run as each line is parsed; the sequence fields of
+        events with a request_id go to <shard_dir>/<partition>-<shard_tag>.jsonl.
+        Returns the number of events and of lines read.
+        """
+        shards = [open(os.path.join(shard_dir, f"{p}-{shard_tag}.jsonl"), 'w', encoding='utf-8')
+                  for p in range(partitions)]
+        count = 0
         try:
-            with open(self.audit_log_path, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
+            with open(self.audit_log_path, 'rb') as f:
+                f.seek(start)
+                pos, line_num = start, first_line - 1
+                while pos < end:
+                    line = f.readline()
+                    if not line:
+                        break
+                    pos += len(line)
+                    line_num += 1
                     line = line.strip()
                     if not line:
                         continue
                     try:
-                        event = json.loads(line)
-                        event['_line_num'] = line_num
-                        events.append(event)
-                    except json.JSONDecodeError as e:
+                        event = json.loads(line.decode('utf-8'))
+                    except ValueError as e:
                         self.errors.append(f"Invalid JSON at line {line_num}: {e}")
-        except Exception as e:
-            self.errors.append(f"Failed to read audit log: {e}")
-
-        return events
-
-    def check_pii_leakage(self, events: List[Dict]) -> None:
-        """Check for PII leakage in audit events."""
-        for event in events:
-            line_num = event.get('_line_num', 'unknown')
-            # Only scan string-valued fields to avoid matching numeric timestamps as phone numbers
-            def scan_string(value: str) -> None:
-                if self.PII_PATTERNS['email'].search(value):
-                    self.errors.append(f"Email pattern found at line {line_num}")
-                if self.PII_PATTERNS['phone'].search(value):
-                    self.errors.append(f"Phone pattern found at line {line_num}")
-                if self.PII_PATTERNS['name'].search(value):
-                    self.errors.append(f"Name pattern found at line {line_num}")
-
-            for k, v in event.items():
-                if k == 'meta':
-                    continue  # handled below
-                if isinstance(v, str):
-                    scan_string(v)
-
-            # Check URI parameters for sensitive data
-            if 'meta' in event and isinstance(event['meta'], dict):
-                for key, value in event['meta'].items():
-                    if isinstance(value, str):
-                        try:
-                            from urllib.parse import urlparse, parse_qs
-                            parsed = urlparse(value)
-                            if parsed.query:
-                                params = parse_qs(parsed.query)
-                                for param_name in params.keys():
-                                    if any(sensitive in param_name.lower() for sensitive in self.SENSITIVE_PARAMS):
-                                        self.errors.append(
-                                            f"Sensitive URI parameter '{param_name}' found at line {line_num}"
-                                        )
-                        except:
-                            pass  # Not a valid URI, skip
-
-    def check_event_sequences(self, events: List[Dict]) -> None:
-        """Check that events follow proper sequences for each request."""
-        # Group events by request_id
-        requests: Dict[str, List[Dict]] = defaultdict(list)
-        for event in events:
-            req_id = event.get('request_id')
-            if req_id:
-                requests[req_id].append(event)
-
-        for req_id, req_events in requests.items():
-            self._check_single_request_sequence(req_id, req_events)
-
-    def _check_single_request_sequence(self, req_id: str, events: List[Dict]) -> None:
-        """Check sequence for a single request."""
-        if not events:
+                        continue
+                    if not isinstance(event, dict):
+                        self.errors.append(f"Invalid JSON at line {line_num}: expected an object")
+                        continue
+                    count += 1
+                    self.check_required_fields(event, line_num)
+                    self.check_pii_leakage(event, line_num)
+
+                    req_id = event.get('request_id')
+                    if req_id:
+                        record = [req_id, event.get('ts', ''), event.get('request_type'),
+                                  event.get('action'), event.get('status')]
+                        shard = shards[partition_of(req_id, partitions)]
+                        shard.write(json.dumps(record, ensure_ascii=False) + '\n')
+        finally:
+            for shard in shards:
+                shard.close()
+        return count, line_num - first_line + 1
+
+    def check_pii_leakage(self, event: Dict, line_num: int) -> None:
+        """Check one audit event for PII leakage."""
+        # Only scan string-valued fields to avoid matching numeric timestamps as phone numbers
+        strings = [v for k, v in event.items()
+                   if k != 'meta' and isinstance(v, str) and not is_single_word(v)]  # meta handled below
+        if strings:
+            self._scan_strings(strings, line_num)
+
+        # Check URI parameters for sensitive data
+        meta = event.get('meta')
+        if isinstance(meta, dict):
+            for value in meta.values():
+                if not isinstance(value, str) or '?' not in value:
+                    continue  # no query string
+                try:
+                    query = urlparse(value).query
+                    params = parse_qs(query) if query else {}
+                except ValueError:
+                    continue  # Not a valid URI, skip
+                for param_name in params:
+                    if is_sensitive_param(param_name):
+                        self.errors.append(f"Sensitive URI parameter '{param_name}' found at line {line_num}")
+
+    def _scan_strings(self, values: List[str], line_num: int) -> None:
+        """Report each PII kind found in each value, in one scan over all of them."""
+        # NUL cannot be part of any PII match, so joined values are matched independently
+        text = '\x00'.join(values)
+        kinds = []
+        if '@' in text:
+            kinds.append('email')
+        if PHONE_HINT.search(text):
+            kinds.append('phone')
+        if NAME_HINT.search(text):
+            kinds.append('name')
+        if not kinds:
             return
 
-        # Sort events by timestamp
-        events.sort(key=lambda e: e.get('ts', ''))
-
-        # Normalize actions/statuses to canonical internal forms
-        for e in events:
-            e['action_norm'] = self._normalize_action(e.get('action'))
-            e['status_norm'] = self._normalize_status(e.get('status'))
+        found: Dict[int, Set[str]] = defaultdict(set)
+        starts = None
+        for match in pii_scanner(tuple(kinds)).finditer(text):
+            if starts is None:
+                starts = list(accumulate((len(value) + 1 for value in values[:-1]), initial=0))
+            found[bisect_right(starts, match.start()) - 1].add(match.lastgroup)
+        for field in sorted(found):
+            # A match hides overlapping matches of other kinds; recheck those on this field only
+            for kind in kinds:
+                if kind in found[field] or self.PII_PATTERNS[kind].search(values[field]):
+                    self.errors.append(f"{self.PII_MESSAGES[kind]} pattern found at line {line_num}")
+
+    def check_event_sequences(self, shard_dir: str, shard_tags: List[str], partition: int) -> None:
+        """Check the event sequence of every request in one request_id partition."""
+        # Group (request_id, ts, request_type, action, status) records by request_id;
+        # shards are read in log order
+        requests: Dict[Any, List[List]] = defaultdict(list)
+        for tag in shard_tags:
+            with open(os.path.join(shard_dir, f"{partition}-{tag}.jsonl"), 'r', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    requests[record[0]].append(record)
+
+        for req_id, records in requests.items():
+            state = self.open_requests.get(req_id)
+            last_ts = 0
+            if state is None and req_id in self.closed_requests:
+                # Closed requests only close once every required action was seen
+                status, req_type, last_ts = self.closed_requests.pop(req_id)
+                state = [status, req_type, self.rules.for_type(req_type).required_actions]
+            state = self._check_single_request_sequence(req_id, records, state)
+            status, req_type, seen_actions = state
+            type_rules = self.rules.for_type(req_type)
+            closed = type_rules.terminal >> self.rules.status_code(status) & 1
+            if closed and not type_rules.required_actions & ~seen_actions:
+                self.open_requests.pop(req_id, None)
+                if self.incremental:
+                    # Records are sorted by ts now; a malformed ts was already reported
+                    ts = records[-1][1]
+                    self.closed_requests[req_id] = (status, req_type, max(last_ts, ts if isinstance(ts, int) else 0))
+            else:
+                self.open_requests[req_id] = state
+
+    def _check_single_request_sequence(self, req_id: str, records: List[List],
+                                       state: Optional[List] = None) -> Optional[List]:
+        """Check the sequence of one request's records, continuing from its checkpointed state if any.
+
+        Returns the request's state after these events.
+        """
+        if not records:
+            return state
 
-        first_event = events[0]
-        req_type = first_event.get('request_type')
+        # Sort events by timestamp
+        records.sort(key=itemgetter(1))
+        rules = self.rules
 
-        # Check that first event is a create
-        if first_event.get('action_norm') != 'create':
-            self.errors.append(f"Request {req_id}: First event should be 'create', got '{first_event.get('action')}'")
+        if state is None:
+            _, _, req_type, first_action, _ = records[0]
+            previous_status, seen_actions = None, 0
 
-        # Check erasure confirmation requirement
-        if req_type == 'erasure':
-            has_confirm = any(e.get('action_norm') == 'confirm' for e in events)
-            if not has_confirm:
-                self.errors.append(f"Request {req_id}: Erasure request missing 'confirm' action")
+            # Check that first event is a create
+            if rules.normalize_action(first_action) != rules.first_action:
+                self.errors.append(f"Request {req_id}: First event should be '{rules.first_action}', got '{first_action}'")
+        else:
+            previous_status, req_type, seen_actions = state
+        type_rules = rules.for_type(req_type)
+        transitions = type_rules.transitions
+        previous_code = rules.status_code(previous_status)
+        required_at = len(self.errors)
 
         # Check for proper status progression
-        status_sequence = [e.get('status_norm') for e in events]
-        self._validate_status_progression(req_id, status_sequence)
-
-    def _validate_status_progression(self, req_id: str, statuses: List[str]) -> None:
-        """Validate that status changes follow allowed transitions."""
-        # Define allowed status transitions
-        allowed_transitions = {
-            'pending': {'inProgress', 'ready', 'completed', 'failed', 'canceled'},
-            'inProgress': {'ready', 'completed', 'failed', 'canceled'},
-            'ready': {'completed', 'failed', 'canceled'},
-            'completed': set(),  # Terminal state
-            'failed': set(),     # Terminal state
-            'canceled': set(),   # Terminal state
-        }
-
-        previous_status = None
-        for status in statuses:
-            if previous_status and status != previous_status:
-                if status not in allowed_transitions.get(previous_status, set()):
-                    self.errors.append(
-                        f"Request {req_id}: Invalid status transition {previous_status} -> {status}"
-                    )
-            previous_status = status
-
-    def check_required_fields(self, events: List[Dict]) -> None:
-        """Check that all events have required fields."""
-        required_fields = {'ts', 'user_id_hash', 'request_id', 'request_type', 'status', 'action'}
-
-        for event in events:
-            line_num = event.get('_line_num', 'unknown')
-            missing = required_fields - set(event.keys())
-            if missing:
-                self.errors.append(f"Event at line {line_num} missing required fields: {missing}")
-
-            # ts must be epoch milliseconds (>= 10^12)
-            ts_value = event.get('ts')
-            if not isinstance(ts_value, int) or ts_value < 1000000000000:
-                self.errors.append(f"Event at line {line_num}: ts must be epoch milliseconds")
-
-            # Check user_id_hash is not raw user ID (should be hash)
-            user_id_hash = event.get('user_id_hash', '')
-            if user_id_hash and len(user_id_hash) < 32:  # SHA-256 is 64 chars hex
-                self.warnings.append(f"Event at line {line_num}: user_id_hash looks suspiciously short")
-
-    @staticmethod
-    def _normalize_action(action: str) -> str:
-        """Map external action enums to canonical internal forms."""
-        if not isinstance(action, str):
-            return action
-        mapping = {
-            'submitted': 'create',
-            'confirmed': 'confirm',
-            # passthroughs
-            'create': 'create',
-            'queued': 'queued',
-            'processing': 'processing',
-            'ready': 'ready',
-            'failed': 'failed',
-            'confirm': 'confirm',
-        }
-        return mapping.get(action, action)
-
-    @staticmethod
-    def _normalize_status(status: str) -> str:
-        """Map external status enums to canonical internal forms."""
-        if not isinstance(status, str):
-            return status
-        mapping = {
-            'started': 'pending',
-            'processing': 'inProgress',
-            'completed': 'completed',
-            'failed': 'failed',
-            'pending': 'pending',
-            'inProgress': 'inProgress',
-            'ready': 'ready',
-            'canceled': 'canceled',
-        }
-        return mapping.get(status, status)
-
-    def run_checks(self) -> bool:
-        """Run all validation checks."""
+        for _, _, _, action, status in records:
+            seen_actions |= rules.action_bit(action)
+            status = rules.normalize_status(status)
+            code = rules.status_code(status)
+            if previous_status and status != previous_status and not transitions[previous_code] >> code & 1:
+                self.errors.append(f"Request {req_id}: Invalid status transition {previous_status} -> {status}")
+            previous_status, previous_code = status, code
+
+        # Check required actions (e.g. erasure confirmation)
+        missing = type_rules.required_actions & ~seen_actions
+        if missing and (not self.incremental or type_rules.terminal >> previous_code & 1):
+            self.errors[required_at:required_at] = [
+                f"Request {req_id}: {req_type.capitalize()} request missing '{action}' action"
+                for action in rules.mask_actions(missing)
+            ]
+
+        return [previous_status, req_type, seen_actions]
+
+    def check_required_fields(self, event: Dict, line_num: int) -> None:
+        """Check that one event has the required fields."""
+        required_fields = self.rules.for_type(event.get('request_type')).required_fields
+        if not event.keys() >= required_fields:
+            missing = {field for field in required_fields if field not in event}
+            self.errors.append(f"Event at line {line_num} missing required fields: {missing}")
+
+        # ts must be epoch milliseconds (>= 10^12)
+        ts_value = event.get('ts')
+        if not isinstance(ts_value, int) or ts_value < 1000000000000:
+            self.errors.append(f"Event at line {line_num}: ts must be epoch milliseconds")
+
+        # Check user_id_hash is not raw user ID (should be hash)
+        user_id_hash = event.get('user_id_hash', '')
+        if user_id_hash and len(user_id_hash) < 32:  # SHA-256 is 64 chars hex
+            self.warnings.append(f"Event at line {line_num}: user_id_hash looks suspiciously short")
+
+    def compact_closed_requests(self, retention_days: float) -> int:
+        """Forget closed requests whose last event is retention_days older than the newest one.
+
+        Returns the number of requests dropped.
+        """
+        if not self.closed_requests:
+            return 0
+        cutoff = max(ts for _, _, ts in self.closed_requests.values()) - retention_days * DAY_MS
+        expired = [req_id for req_id, (_, _, ts) in self.closed_requests.items() if ts < cutoff]
+        for req_id in expired:
+            del self.closed_requests[req_id]
+        return len(expired)
+
+    def run_checks(self, jobs: int = 1, checkpoint_path: Optional[str] = None,
+                   closed_retention_days: float = CLOSED_RETENTION_DAYS) -> bool:
+        """Run all validation checks in one pass over the log (split across up to jobs processes).
+
+        With checkpoint_path, resume after the last checkpointed line and save
+        a new checkpoint when the run passes, keeping closed requests for
+        closed_retention_days after their last event.
+        """
         if not self.check_file_exists():
             return False
 
-        events = self.load_audit_events()
-
-        if not events:
+        path = str(self.audit_log_path)
+        size = self.audit_log_path.stat().st_size
+        start, first_line, previous_count = 0, 1, 0
+        end = size
+        if checkpoint_path:
+            self.incremental = True
+            # A line still being appended is left for the next run
+            end = complete_end(path, size)
+            checkpoint = load_checkpoint(checkpoint_path, path)
+            if checkpoint:
+                start, first_line, previous_count = checkpoint['offset'], checkpoint['lines'] + 1, checkpoint['events']
+                self.open_requests = {
+                    req_id: [status, req_type, self.rules.action_mask(actions)]
+                    for req_id, status, req_type, actions in checkpoint['open_requests']
+                }
+                self.closed_requests = {
+                    req_id: (status, req_type, ts)
+                    for status, req_type, req_ids, last_ts in checkpoint['closed_requests']
+                    for req_id, ts in zip(req_ids, last_ts)
+                }
+                print(f"Resuming from line {first_line} (byte {start}) with "
+                      f"{len(self.open_requests)} open and {len(self.closed_requests)} closed requests")
+
+        partitions = max(1, -(-(end - start) // PARTITION_BYTES))
+        ranges = split_ranges(path, start, end, max(1, min(jobs, (end - start) // MIN_CHUNK_BYTES)))
+        tags = [f"{i:06d}" for i in range(len(ranges))]
+        lines = first_line - 1
+
+        with tempfile.TemporaryDirectory(prefix='dsr_audit_') as shard_dir:
+            try:
+                if len(ranges) <= 1:
+                    count = 0
+                    for (r_start, r_end), tag in zip(ranges, tags):
+                        count, range_lines = self.check_range(r_start, r_end, first_line, shard_dir, tag, partitions)
+                        lines += range_lines
+                    for partition in range(partitions):
+                        self.check_event_sequences(shard_dir, tags, partition)
+                else:
+                    open_by_partition = [{} for _ in range(partitions)]
+                    for req_id, state in self.open_requests.items():
+                        open_by_partition[partition_of(req_id, partitions)][req_id] = state
+                    closed_by_partition = [{} for _ in range(partitions)]
+                    for req_id, state in self.closed_requests.items():
+                        closed_by_partition[partition_of(req_id, partitions)][req_id] = state
+                    with Pool(processes=len(ranges)) as pool:
+                        line_counts = pool.map(_count_lines, [(path, r_start, r_end) for r_start, r_end in ranges])
+                        first_lines = [first_line + sum(line_counts[:i]) for i in range(len(ranges))]
+                        lines += sum(line_counts)
+                        chunks = pool.map(_check_chunk, [
+                            (path, self.rules_path, r_start, r_end, r_first_line, shard_dir, tag, partitions)
+                            for (r_start, r_end), r_first_line, tag in zip(ranges, first_lines, tags)
+                        ])
+                        sequences = pool.map(_check_partition, [
+                            (path, self.rules_path, shard_dir, tags, partition, open_by_partition[partition],
+                             closed_by_partition[partition], self.incremental)
+                            for partition in range(partitions)
+                        ])
+                    count = 0
+                    for events, errors, warnings in chunks:
+                        count += events
+                        self.errors.extend(errors)
+                        self.warnings.extend(warnings)
+                    self.open_requests, self.closed_requests = {}, {}
+                    for errors, warnings, open_requests, closed_requests in sequences:
+                        self.errors.extend(errors)
+                        self.warnings.extend(warnings)
+                        self.open_requests.update(open_requests)
+                        self.closed_requests.update(closed_requests)
+            except OSError as e:
+                self.errors.append(f"Failed to read audit log: {e}")
+                return False
+
+        if not count and not previous_count:
             self.errors.append("No audit events found in log file")
             return False
 
-        print(f"Loaded {len(events)} audit events from {self.audit_log_path}")
-
-        self.check_required_fields(events)
-        self.check_pii_leakage(events)
-        self.check_event_sequences(events)
+        if start:
+            print(f"Checked {count} new audit events from {self.audit_log_path} "
+                  f"({previous_count + count} total)")
+        else:
+            print(f"Checked {count} audit events from {self.audit_log_path}")
 
-        return len(self.errors) == 0
+        if self.errors:
+            return False
+        if checkpoint_path:
+            open_requests = [[req_id, status, req_type, self.rules.mask_actions(seen_actions)]
+                             for req_id, (status, req_type, seen_actions) in self.open_requests.items()]
+            expired = self.compact_closed_requests(closed_retention_days)
+            # Closed request ids (with their last ts) grouped by (status, request_type) to keep the checkpoint small
+            closed_groups: Dict[Tuple[str, Any], List[List]] = defaultdict(lambda: [[], []])
+            for req_id, (status, req_type, ts) in self.closed_requests.items():
+                # Non-string types all get the global rules; None keeps them hashable
+                group = closed_groups[status, req_type if isinstance(req_type, str) else None]
+                group[0].append(req_id)
+                group[1].append(ts)
+            closed_requests = [[status, req_type, req_ids, last_ts]
+                               for (status, req_type), (req_ids, last_ts) in closed_groups.items()]
+            save_checkpoint(checkpoint_path, path, end, lines, previous_count + count, open_requests, closed_requests)
+            print(f"📌 Checkpoint saved to {checkpoint_path} (line {lines}, "
+                  f"{len(self.open_requests)} open and {len(self.closed_requests)} closed requests, "
+                  f"{expired} closed requests past retention dropped)")
+        return True
 
     def report_results(self) -> None:
         """Print validation results."""
@@ -258,18 +446,164 @@ class DsrAuditLeakChecker:
                 print(f"  - {warning}")
 
 
-def main():
-    """Main entry point."""
-    if len(sys.argv) != 2:
-        print("Usage: python3 dsr_audit_leak_check.py <audit_log_file>")
-        print("Default audit log path: build/dsr_audit.log")
-        audit_log = "build/dsr_audit.log"
-    else:
-        audit_log = sys.argv[1]
+@lru_cache(maxsize=None)
+def pii_scanner(kinds: Tuple[str, ...]) -> 're.Pattern':
+    """One alternation of the given kinds' PII_PATTERNS, each in a group named after its kind."""
+    patterns = DsrAuditLeakChecker.PII_PATTERNS
+    return re.compile('|'.join(f"(?P<{kind}>{patterns[kind].pattern})" for kind in kinds))
+
+
+def is_single_word(value: str) -> bool:
+    """True for ASCII strings with no word boundary inside that cannot hold any PII pattern.
+
+    Hashes, enum values and identifiers have no '@' or whitespace, so only an
+    all-digit string could still match (the phone pattern).
+    """
+    return value.isascii() and (value.isidentifier() or (value.isalnum() and not value.isdigit()))
+
+
+@lru_cache(maxsize=4096)
+def is_sensitive_param(param_name: str) -> bool:
+    return DsrAuditLeakChecker.SENSITIVE_PARAM_RE.search(param_name.lower()) is not None
+
+
+def partition_of(req_id: Any, partitions: int) -> int:
+    """Sequence partition of a request_id (stable across processes and runs)."""
+    return zlib.crc32(str(req_id).encode('utf-8')) % partitions
+
+
+def split_ranges(path: str, start: int, end: int, chunks: int) -> List[Tuple[int, int]]:
+    """Split [start, end) into up to chunks byte ranges that start at line boundaries."""
+    if start >= end:
+        return []
+    bounds = [start]
+    with open(path, 'rb') as f:
+        for i in range(1, chunks):
+            f.seek(max(start + (end - start) * i // chunks - 1, bounds[-1]))
+            f.readline()  # finish the line the cut falls into
+            if bounds[-1] < f.tell() < end:
+                bounds.append(f.tell())
+    bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def complete_end(path: str, size: int) -> int:
+    """Offset just past the last newline (0 if the log has no complete line)."""
+    with open(path, 'rb') as f:
+        pos = size
+        while pos > 0:
+            block_start = max(0, pos - READ_BLOCK)
+            f.seek(block_start)
+            newline = f.read(pos - block_start).rfind(b'\n')
+            if newline >= 0:
+                return block_start + newline + 1
+            pos = block_start
+    return 0
+
+
+def tail_crc32(path: str, offset: int) -> int:
+    """CRC-32 of the CHECKPOINT_TAIL_BYTES (or fewer) bytes before offset."""
+    start = max(0, offset - CHECKPOINT_TAIL_BYTES)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return zlib.crc32(f.read(offset - start))
+
+
+def load_checkpoint(checkpoint_path: str, log_path: str) -> Optional[Dict]:
+    """Checkpoint for log_path, or None if there is none or the log no longer matches it."""
+    if not os.path.exists(checkpoint_path):
+        return None
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Ignoring unreadable checkpoint {checkpoint_path}: {e}")
+        return None
+
+    if checkpoint.get('version') != CHECKPOINT_VERSION or checkpoint.get('log') != os.path.abspath(log_path):
+        print(f"⚠️  Checkpoint {checkpoint_path} is for another log or format, validating from the start")
+        return None
+    offset = checkpoint['offset']
+    if os.path.getsize(log_path) < offset or tail_crc32(log_path, offset) != checkpoint['tail_crc32']:
+        print(f"⚠️  {log_path} was rewritten since checkpoint {checkpoint_path}, validating from the start")
+        return None
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_path: str, log_path: str, offset: int, lines: int, events: int,
+                    open_requests: List[List], closed_requests: List[List]) -> None:
+    checkpoint = {
+        'version': CHECKPOINT_VERSION,
+        'log': os.path.abspath(log_path),
+        'offset': offset,
+        'lines': lines,
+        'events': events,
+        'tail_crc32': tail_crc32(log_path, offset),
+        'open_requests': open_requests,
+        'closed_requests': closed_requests
+    }
+    directory = os.path.dirname(checkpoint_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def _count_lines(args: Tuple[str, int, int]) -> int:
+    path, start, end = args
+    count = 0
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(READ_BLOCK, remaining))
+            if not block:
+                break
+            count += block.count(b'\n')
+            remaining -= len(block)
+    return count
+
+
+def _check_chunk(args) -> Tuple[int, List[str], List[str]]:
+    path, rules_path, start, end, first_line, shard_dir, tag, partitions = args
+    checker = DsrAuditLeakChecker(path, rules_path)
+    count, _ = checker.check_range(start, end, first_line, shard_dir, tag, partitions)
+    return count, checker.errors, checker.warnings
+
+
+def _check_partition(args) -> Tuple[List[str], List[str], Dict, Dict]:
+    path, rules_path, shard_dir, tags, partition, open_requests, closed_requests, incremental = args
+    checker = DsrAuditLeakChecker(path, rules_path)
+    checker.open_requests = open_requests
+    checker.closed_requests = closed_requests
+    checker.incremental = incremental
+    checker.check_event_sequences(shard_dir, tags, partition)
+    return checker.errors, checker.warnings, checker.open_requests, checker.closed_requests
 
-    checker = DsrAuditLeakChecker(audit_log)
 
-    success = checker.run_checks()
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Validate DSR audit logs for PII leakage and event sequences")
+    parser.add_argument("audit_log", nargs="?", default="build/dsr_audit.log",
+                        help="JSONL audit log (default: build/dsr_audit.log)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Parallel worker processes for large logs (default: CPU count, 1 disables the pool)")
+    parser.add_argument("--checkpoint", type=str,
+                        help="Resume from and update this checkpoint file, validating only appended lines. "
+                             "Closed request ids are kept for --closed-retention-days after their last event; "
+                             "an event for a request closed longer ago is checked as a new request")
+    parser.add_argument("--closed-retention-days", type=float, default=CLOSED_RETENTION_DAYS,
+                        help=f"Days a closed request stays in the checkpoint after its last event, counted "
+                             f"back from the newest closed request (default: {CLOSED_RETENTION_DAYS})")
+    parser.add_argument("--rules", type=str, default=DEFAULT_RULES_PATH,
+                        help="DSR audit rules config (default: dsr_audit_rules.json next to this script)")
+    args = parser.parse_args()
+
+    checker = DsrAuditLeakChecker(args.audit_log, args.rules)
+
+    success = checker.run_checks(args.jobs, args.checkpoint, args.closed_retention_days)
     checker.report_results()
 
     if success:
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+DSR Audit Rules
+
+Compiles the declarative rules in dsr_audit_rules.json (status state machine,
+action/status aliases, required fields and actions per request type) into
+lookup tables for dsr_audit_leak_check.py. Statuses are numbered, each row of
+a transition table is a bitmask of allowed next statuses, and required
+actions are a bitmask per request type, so checking an event is a few dict
+lookups and bit tests. New request types, statuses or aliases only need a
+config change.
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, NamedTuple
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dsr_audit_rules.json")
+
+class TypeRules(NamedTuple):
+    """Compiled rules for one request type."""
+    required_fields: FrozenSet[str]
+    required_actions: int   # bitmask over DsrRules.actions
+    transitions: List[int]  # status code -> bitmask of allowed next status codes
+    terminal: int           # bitmask of status codes with no allowed transition
+
+class DsrRules:
+    def __init__(self, config: Dict[str, Any]):
+        type_configs = config.get("request_types", {})
+        tables = [config["transitions"]] + [t["transitions"] for t in type_configs.values() if "transitions" in t]
+
+        # Every status named in any transition table gets a code; one extra
+        # code stands for statuses the rules do not know
+        self.statuses: List[str] = []
+        for table in tables:
+            for status, targets in table.items():
+                for name in [status, *targets]:
+                    if name not in self.statuses:
+                        self.statuses.append(name)
+        self.unknown = len(self.statuses)
+
+        self.first_action = config.get("first_action", "create")
+        self.required_fields = frozenset(config.get("required_fields", []))
+        self.status_names = {status: status for status in self.statuses}
+        self.status_names.update(config.get("status_aliases", {}))
+        self.action_names = dict(config.get("action_aliases", {}))
+
+        # Raw (possibly aliased) value -> code / bit, so events need a single lookup
+        self.status_codes = {raw: self.statuses.index(name)
+                             for raw, name in self.status_names.items() if name in self.statuses}
+        self.actions: List[str] = []
+        self.action_bits: Dict[str, int] = {}
+
+        self.default = self._compile_type({}, config["transitions"])
+        self.types = {name: self._compile_type(type_config, config["transitions"])
+                      for name, type_config in type_configs.items()}
+
+    def _compile_type(self, type_config: Dict[str, Any], default_transitions: Dict[str, List[str]]) -> TypeRules:
+        rows = [0] * (self.unknown + 1)
+        terminal = 0
+        for status, targets in type_config.get("transitions", default_transitions).items():
+            code = self.statuses.index(status)
+            for target in targets:
+                rows[code] |= 1 << self.statuses.index(target)
+            if not targets:
+                terminal |= 1 << code
+
+        required_actions = 0
+        for action in type_config.get("required_actions", []):
+            if action not in self.actions:
+                self.actions.append(action)
+                bit = 1 << (len(self.actions) - 1)
+                self.action_bits[action] = bit
+                for alias, name in self.action_names.items():
+                    if name == action:
+                        self.action_bits[alias] = bit
+            required_actions |= self.action_bits[action]
+
+        required_fields = self.required_fields | frozenset(type_config.get("required_fields", []))
+        return TypeRules(required_fields, required_actions, rows, terminal)
+
+    def for_type(self, request_type: Any) -> TypeRules:
+        """Rules for a request type; unlisted types get the global rules."""
+        return self.types.get(request_type, self.default) if isinstance(request_type, str) else self.default
+
+    def normalize_action(self, action: Any) -> Any:
+        """Canonical name of an action (unknown and non-string values pass through)."""
+        return self.action_names.get(action, action) if isinstance(action, str) else action
+
+    def normalize_status(self, status: Any) -> Any:
+        """Canonical name of a status (unknown and non-string values pass through)."""
+        return self.status_names.get(status, status) if isinstance(status, str) else status
+
+    def status_code(self, status: Any) -> int:
+        return self.status_codes.get(status, self.unknown) if isinstance(status, str) else self.unknown
+
+    def action_bit(self, action: Any) -> int:
+        """Bit of a required action (0 for actions no request type requires)."""
+        return self.action_bits.get(action, 0) if isinstance(action, str) else 0
+
+    def action_mask(self, actions: List[str]) -> int:
+        return sum(self.action_bits.get(action, 0) for action in set(actions))
+
+    def mask_actions(self, mask: int) -> List[str]:
+        return [action for i, action in enumerate(self.actions) if mask >> i & 1]
+
+@lru_cache(maxsize=None)
+def load_rules(path: str = DEFAULT_RULES_PATH) -> DsrRules:
+    """Compiled rules from a JSON config (compiled once per process)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return DsrRules(json.load(f))
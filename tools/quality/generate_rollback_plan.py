@@ -60,7 +60,7 @@ def create_violation_ticket(violations_data: Dict[str, Any], phase: str) -> str:
         f"| Crash-free Sessions | {metrics.get('crash_free_sessions_pct', 'N/A')}% | {'❌' if any(v['gate'] == 'crash_free_sessions' for v in violations) else '✅'} |\n",
         f"| ANR Rate | {metrics.get('anr_rate_pct', 'N/A')}% | {'❌' if any(v['gate'] == 'anr_rate' for v in violations) else '✅'} |\n",
         f"| Fatal Crash Rate | {metrics.get('fatal_rate_pct', 'N/A')}% | {'❌' if any(v['gate'] == 'fatal_rate' for v in violations) else '✅'} |\n",
-        f"| Cold Start Regression | {abs(metrics.get('cold_start_regression_pct', 0))}% | {'❌' if any(v['gate'] == 'cold_start_regression' for v in violations) else '✅'} |\n",
+        f"| Cold Start Regression | {metrics.get('cold_start_regression_pct', 'N/A')}% | {'❌' if any(v['gate'] == 'cold_start_regression' for v in violations) else '✅'} |\n",
         "\n## Immediate Actions Required\n",
         "\n### 1. Stop Rollout Expansion\n",
         "**Play Console:** Navigate to Release > Production > Manage\n",
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+"""
+Quality Metrics Collector - P-QG-01
+
+Fetches every metrics provider (tools/quality/providers) concurrently in one
+asyncio fan-out, with a per-provider timeout and retries with exponential
+backoff, and writes each provider's usual report file. Responses are cached
+on disk per (provider, app, version code, window); a cached response is reused
+for as long as the provider's data_freshness_hours says the upstream data
+cannot have changed.
+
+A provider module exposes NAME, OUTPUT_FILE, REQUIRED_ENV, TIMEOUT_SECONDS,
+fetch_metrics(version_code, app, window_days) and gate_metrics(result).
+fetch_metrics may be a coroutine function. A blocking one runs on a daemon
+thread: timeouts do not bound that thread, they only stop waiting for it. A
+retry after a timeout waits on the same call again rather than starting
+another thread, and an abandoned thread never holds up the process exit.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import argparse
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "providers"))
+import crashlytics  # noqa: E402
+import play_reporting  # noqa: E402
+
+PROVIDERS = [play_reporting, crashlytics]
+
+DEFAULT_CACHE_DIR = "tools/reports/.cache/metrics"
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_SECONDS = 0.5
+# Used when a response does not say how fresh its data is
+DEFAULT_TTL_HOURS = 1.0
+
+def cache_path(cache_dir: str, key: Dict[str, Any]) -> str:
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{key['provider']}-{digest}.json")
+
+def load_cached(cache_dir: str, key: Dict[str, Any], now: float) -> Optional[Dict[str, Any]]:
+    """Cached response for key if it is younger than its data_freshness_hours."""
+    try:
+        with open(cache_path(cache_dir, key), 'r') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("key") != key or now - entry["cached_at"] >= entry["ttl_hours"] * 3600:
+        return None
+    return entry["response"]
+
+def store_cached(cache_dir: str, key: Dict[str, Any], response: Dict[str, Any], now: float) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(cache_dir, key)
+    entry = {
+        "key": key,
+        "cached_at": now,
+        "ttl_hours": float(response.get("data_freshness_hours", DEFAULT_TTL_HOURS)),
+        "response": response
+    }
+    with open(path + ".tmp", 'w') as f:
+        json.dump(entry, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def start_blocking(func, *args) -> 'asyncio.Future':
+    """Future for func(*args) run on a daemon thread.
+
+    Unlike asyncio.to_thread, nothing joins the thread: asyncio.run() and the
+    interpreter exit do not wait for a call that is still hanging.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    # Consume a late exception nobody awaits any more, so it is not logged
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def deliver(setter, value):
+        if not future.done():
+            setter(value)
+
+    def run():
+        try:
+            outcome = (future.set_result, func(*args))
+        except Exception as e:
+            outcome = (future.set_exception, e)
+        try:
+            loop.call_soon_threadsafe(deliver, *outcome)
+        except RuntimeError:
+            pass  # the loop is gone: the fetch was given up on
+
+    threading.Thread(target=run, name=f"fetch-{getattr(func, '__module__', 'provider')}", daemon=True).start()
+    return future
+
+async def fetch_with_retry(provider, version_code: Optional[int], app: str, window_days: int,
+                           timeout: float, retries: int, backoff: float) -> Dict[str, Any]:
+    """One provider fetch, retried with jittered exponential backoff on errors and timeouts.
+
+    The timeout bounds how long this waits, not a blocking provider's thread:
+    a timed-out call keeps running, and the next attempt waits on it again
+    instead of starting another thread, so each provider has at most one.
+    """
+    pending = None
+    for attempt in range(retries + 1):
+        try:
+            if asyncio.iscoroutinefunction(provider.fetch_metrics):
+                call = provider.fetch_metrics(version_code, app, window_days)
+            else:
+                if pending is None or (pending.done() and pending.exception() is not None):
+                    pending = start_blocking(provider.fetch_metrics, version_code, app, window_days)
+                call = asyncio.shield(pending)
+            return await asyncio.wait_for(call, timeout)
+        except Exception as e:
+            if attempt == retries:
+                if isinstance(e, asyncio.TimeoutError):
+                    raise TimeoutError(f"no response within {timeout:g}s ({retries + 1} attempts)") from e
+                raise
+            await asyncio.sleep(backoff * 2 ** attempt * (1 + random.random()))
+
+async def collect(requests: List[Tuple[Any, Optional[int], str]], window_days: int, cache_dir: Optional[str],
+                  timeout: Optional[float] = None, retries: int = DEFAULT_RETRIES,
+                  backoff: float = DEFAULT_BACKOFF_SECONDS) -> Dict[str, Dict[str, Any]]:
+    """Fetch (provider, version_code, app) requests concurrently.
+
+    Returns {provider name: {"result", "cached"} or {"error"}}; one provider
+    failing does not cancel the others.
+    """
+    now = time.time()
+
+    async def one(provider, version_code, app):
+        missing = [name for name in provider.REQUIRED_ENV if not os.getenv(name)]
+        if missing:
+            return {"error": f"{', '.join(missing)} environment variable(s) not set"}
+        key = {"provider": provider.NAME, "app": app, "version_code": version_code, "window_days": window_days}
+        if cache_dir:
+            cached = load_cached(cache_dir, key, now)
+            if cached is not None:
+                return {"result": cached, "cached": True}
+        try:
+            result = await fetch_with_retry(provider, version_code, app, window_days,
+                                            timeout or provider.TIMEOUT_SECONDS, retries, backoff)
+        except Exception as e:
+            return {"error": str(e) or type(e).__name__}
+        if cache_dir:
+            store_cached(cache_dir, key, result, now)
+        return {"result": result, "cached": False}
+
+    outcomes = await asyncio.gather(*(one(*request) for request in requests))
+    return {request[0].NAME: outcome for request, outcome in zip(requests, outcomes)}
+
+def collect_metrics(version_code: int, package: str, app_id: str, window_days: int,
+                    cache_dir: Optional[str] = DEFAULT_CACHE_DIR, history_dir: Optional[str] = None,
+                    **options) -> Dict[str, Dict[str, Any]]:
+    """Fetch Play and Crashlytics metrics, write their report files and return the outcomes.
+
+    With history_dir, freshly fetched (not cached) gate metrics are appended
+    to the metrics history as one sample.
+    """
+    requests = [(play_reporting, version_code, package), (crashlytics, version_code, app_id)]
+    outcomes = asyncio.run(collect(requests, window_days, cache_dir, **options))
+
+    os.makedirs("tools/reports", exist_ok=True)
+    fresh = {}
+    for provider, _, _ in requests:
+        outcome = outcomes[provider.NAME]
+        if "error" in outcome:
+            continue
+        with open(provider.OUTPUT_FILE, 'w') as f:
+            json.dump(outcome["result"], f, indent=2)
+        if not outcome["cached"]:
+            fresh.update(provider.gate_metrics(outcome["result"]))
+
+    if history_dir:
+        from metrics_history import record_history
+        record_history(history_dir, version_code, fresh)
+    return outcomes
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch all quality metrics providers concurrently")
+    parser.add_argument("--versionCode", type=int, required=True, help="App version code to check")
+    parser.add_argument("--package", type=str, required=True, help="Android package name (Play)")
+    parser.add_argument("--app", type=str, required=True, help="Firebase app ID (Crashlytics)")
+    parser.add_argument("--window", type=int, default=1, help="Analysis window in days")
+    parser.add_argument("--cache-dir", type=str, default=DEFAULT_CACHE_DIR,
+                        help=f"Response cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch, ignoring cached responses")
+    parser.add_argument("--timeout", type=float, help="Per-provider timeout in seconds (default: per provider)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help=f"Retries per provider after a failure or timeout (default: {DEFAULT_RETRIES})")
+    parser.add_argument("--history", type=str, help="Also append fresh metrics to this history directory (requires numpy)")
+
+    args = parser.parse_args()
+
+    outcomes = collect_metrics(args.versionCode, args.package, args.app, args.window,
+                               cache_dir=None if args.no_cache else args.cache_dir, history_dir=args.history,
+                               timeout=args.timeout, retries=args.retries)
+
+    failed = False
+    for provider in PROVIDERS:
+        outcome = outcomes[provider.NAME]
+        if "error" in outcome:
+            print(f"ERROR: Failed to fetch {provider.NAME} metrics: {outcome['error']}", file=sys.stderr)
+            failed = True
+            continue
+        source = "cache" if outcome["cached"] else "fetched"
+        print(f"✅ {provider.NAME} metrics ({source}) saved to {provider.OUTPUT_FILE}")
+        for metric, value in provider.gate_metrics(outcome["result"]).items():
+            print(f"📊 {metric}: {value}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+"""
+Quality Metrics History - P-QG-01
+
+Time series of quality metrics per version code, stored as one NumPy .npz
+file per version (a `ts` column of epoch seconds plus one float column per
+metric, NaN where a sample did not report that metric). Providers append a
+sample on every fetch; the gate engine evaluates thresholds over rolling
+windows with vectorized prefix sums, so every window of every rollout phase
+is judged in one call.
+"""
+
+import os
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+def history_path(history_dir: str, version_code: int) -> str:
+    return os.path.join(history_dir, f"{version_code}.npz")
+
+def load_history(history_dir: str, version_code: int) -> Dict[str, np.ndarray]:
+    """Columns for one version code, sorted by timestamp ({} when there is no history)."""
+    path = history_path(history_dir, version_code)
+    if not os.path.exists(path):
+        return {}
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+def append_sample(history_dir: str, version_code: int, metrics: Dict[str, float],
+                  timestamp: Optional[float] = None) -> None:
+    """Append one sample of metrics (any subset of columns) to a version's history."""
+    columns = load_history(history_dir, version_code)
+    ts = time.time() if timestamp is None else timestamp
+    n = len(columns.get("ts", ()))
+
+    for name in metrics:
+        if name not in columns:
+            columns[name] = np.full(n, np.nan)
+    updated = {"ts": np.append(columns.pop("ts", np.empty(0, dtype=np.int64)), np.int64(ts))}
+    for name, values in columns.items():
+        updated[name] = np.append(values, float(metrics.get(name, np.nan)))
+
+    order = np.argsort(updated["ts"], kind="stable")
+    if not np.all(order[:-1] < order[1:]):
+        updated = {name: values[order] for name, values in updated.items()}
+
+    os.makedirs(history_dir, exist_ok=True)
+    tmp_path = history_path(history_dir, version_code) + ".tmp.npz"
+    np.savez(tmp_path, **updated)
+    os.replace(tmp_path, history_path(history_dir, version_code))
+
+def record_history(history_dir: str, version_code: int, metrics: Dict[str, float]) -> None:
+    """Append one fetch's gate metrics to a version's history (nothing if there are none)."""
+    if metrics:
+        append_sample(history_dir, version_code, metrics)
+
+def gate_windows(gates_config: Dict[str, Any]) -> List[Tuple[str, float]]:
+    """(label, hours) for the config's window_days and every rollout phase's monitoring window."""
+    windows = [("window_days", gates_config.get("window_days", 1) * 24.0)]
+    for phase, phase_config in gates_config.get("rollout_phases", {}).items():
+        if "monitoring_window_hours" in phase_config:
+            windows.append((phase, float(phase_config["monitoring_window_hours"])))
+    return windows
+
+def threshold_metrics(thresholds: Dict[str, float]) -> List[Tuple[str, str, float]]:
+    """(metric, 'min'|'max', limit) for every <metric>_min / <metric>_max threshold."""
+    limits = []
+    for key, limit in thresholds.items():
+        metric, _, bound = key.rpartition("_")
+        if bound in ("min", "max") and metric:
+            limits.append((metric, bound, float(limit)))
+    return limits
+
+def evaluate_windows(columns: Dict[str, np.ndarray], thresholds: Dict[str, float],
+                     windows: List[Tuple[str, float]], now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+    """Judge every threshold over every window at once.
+
+    For each window and metric this reports the sample count, the mean, the
+    least-squares slope (per day) and the value that trend projects to one
+    window length ahead. A window fails on its mean; it trends toward failure
+    when the projection crosses the limit while the mean still passes.
+    """
+    if not columns or len(columns["ts"]) == 0:
+        return {}
+    now = time.time() if now is None else now
+    ts = columns["ts"].astype(np.float64)
+    hours = np.array([h for _, h in windows])
+    starts = np.searchsorted(ts, now - hours * 3600.0, side="left")
+    end = np.searchsorted(ts, now, side="right")
+
+    results = {label: {} for label, _ in windows}
+    for metric, bound, limit in threshold_metrics(thresholds):
+        values = columns.get(metric)
+        if values is None:
+            continue
+        present = ~np.isnan(values)
+        t = np.where(present, (ts - now) / 86400.0, 0.0)  # days relative to now
+        y = np.where(present, values, 0.0)
+
+        # Prefix sums give every window's regression terms without slicing
+        def window_sums(series):
+            prefix = np.concatenate(([0.0], np.cumsum(series)))
+            return prefix[end] - prefix[starts]
+
+        n = window_sums(present.astype(np.float64))
+        st, sy, stt, sty = window_sums(t), window_sums(y), window_sums(t * t), window_sums(t * y)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = sy / n
+            denom = n * stt - st * st
+            slope = np.where(denom > 0, (n * sty - st * sy) / denom, 0.0)
+            intercept = (sy - slope * st) / n
+        projected = intercept + slope * (hours / 24.0)
+
+        if bound == "min":
+            failed, trending = mean < limit, projected < limit
+        else:
+            failed, trending = mean > limit, projected > limit
+
+        for i, (label, window_hours) in enumerate(windows):
+            if n[i] == 0:
+                continue
+            results[label][metric] = {
+                "window_hours": window_hours,
+                "samples": int(n[i]),
+                "mean": round(float(mean[i]), 4),
+                "slope_per_day": round(float(slope[i]), 4) + 0.0,
+                "projected": round(float(projected[i]), 4),
+                "bound": bound,
+                "limit": limit,
+                "ok": not bool(failed[i]),
+                "trend_ok": bool(failed[i]) or not bool(trending[i])
+            }
+    return results
@@ -14,6 +14,12 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 
+# Provider interface used by tools/quality/metrics_collector.py
+NAME = "crashlytics"
+OUTPUT_FILE = "tools/reports/PQG_crashlytics_metrics.json"
+REQUIRED_ENV = ("FIREBASE_PROJECT_ID", "FIREBASE_APP_ID")
+TIMEOUT_SECONDS = 20.0
+
 def simulate_crashlytics_api_call(app_id: str, window_days: int) -> Dict[str, Any]:
     """
     Simulate Firebase Crashlytics API call.
@@ -68,12 +74,29 @@ def simulate_crashlytics_api_call(app_id: str, window_days: int) -> Dict[str, An
         ]
     }
 
+def fetch_metrics(version_code: Optional[int], app: str, window_days: int) -> Dict[str, Any]:
+    """Crash metrics for the Firebase app over the window."""
+    # In production, this would authenticate and call Firebase APIs
+    # For now, simulate the API response
+    return simulate_crashlytics_api_call(app, window_days)
+
+def gate_metrics(result: Dict[str, Any]) -> Dict[str, float]:
+    """Metrics of a fetch result, named as the quality gate thresholds name them."""
+    return {
+        "crash_free_sessions_pct": result["metrics"]["crash_free_sessions_pct"],
+        "fatal_rate_pct": result["metrics"]["fatal_crash_rate_pct"]
+    }
+
 def main():
     parser = argparse.ArgumentParser(description="Fetch Crashlytics metrics for quality gates")
     parser.add_argument("--app", type=str, required=True, help="Firebase app ID")
     parser.add_argument("--window", type=int, default=1, help="Analysis window in days")
+    parser.add_argument("--versionCode", type=int, help="App version code the metrics belong to (for --history)")
+    parser.add_argument("--history", type=str, help="Also append the metrics to this history directory (requires numpy)")
 
     args = parser.parse_args()
+    if args.history and args.versionCode is None:
+        parser.error("--history requires --versionCode")
 
     # Validate environment
     firebase_project = os.getenv("FIREBASE_PROJECT_ID")
@@ -84,17 +107,20 @@ def main():
         sys.exit(1)
 
     try:
-        # In production, this would authenticate and call Firebase APIs
-        # For now, simulate the API response
-        result = simulate_crashlytics_api_call(args.app, args.window)
+        result = fetch_metrics(args.versionCode, args.app, args.window)
 
         # Write to output file
-        output_file = "tools/reports/PQG_crashlytics_metrics.json"
+        output_file = OUTPUT_FILE
         os.makedirs("tools/reports", exist_ok=True)
 
         with open(output_file, 'w') as f:
             json.dump(result, f, indent=2)
 
+        if args.history:
+            # metrics_history lives in tools/quality, which must be on PYTHONPATH
+            from metrics_history import record_history
+            record_history(args.history, args.versionCode, gate_metrics(result))
+
         print(f"✅ Crashlytics metrics fetched and saved to {output_file}")
         print(f"📊 Crash-free Sessions: {result['metrics']['crash_free_sessions_pct']}%")
         print(f"📊 Fatal Crash Rate: {result['metrics']['fatal_crash_rate_pct']}%")
@@ -14,6 +14,12 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 
+# Provider interface used by tools/quality/metrics_collector.py
+NAME = "play"
+OUTPUT_FILE = "tools/reports/PQG_play_metrics.json"
+REQUIRED_ENV = ("PLAY_SERVICE_ACCOUNT_JSON",)
+TIMEOUT_SECONDS = 30.0
+
 def simulate_play_api_call(version_code: int, package_name: str, window_days: int) -> Dict[str, Any]:
     """
     Simulate Google Play Developer Reporting API call.
@@ -52,11 +58,25 @@ def simulate_play_api_call(version_code: int, package_name: str, window_days: in
         "confidence_level": "high" if window_days >= 1 else "medium"
     }
 
+def fetch_metrics(version_code: int, app: str, window_days: int) -> Dict[str, Any]:
+    """Vitals for one version of the app package over the window."""
+    # In production, this would authenticate and call Google Play APIs
+    # For now, simulate the API response
+    return simulate_play_api_call(version_code, app, window_days)
+
+def gate_metrics(result: Dict[str, Any]) -> Dict[str, float]:
+    """Metrics of a fetch result, named as the quality gate thresholds name them."""
+    return {
+        "anr_rate_pct": result["metrics"]["anr_rate"],
+        "crash_rate": result["metrics"]["crash_rate"]
+    }
+
 def main():
     parser = argparse.ArgumentParser(description="Fetch Play Vitals metrics for quality gates")
     parser.add_argument("--versionCode", type=int, required=True, help="App version code to check")
     parser.add_argument("--package", type=str, required=True, help="Android package name")
     parser.add_argument("--window", type=int, default=1, help="Analysis window in days")
+    parser.add_argument("--history", type=str, help="Also append the metrics to this history directory (requires numpy)")
 
     args = parser.parse_args()
 
@@ -67,17 +87,20 @@ def main():
         sys.exit(1)
 
     try:
-        # In production, this would authenticate and call Google Play APIs
-        # For now, simulate the API response
-        result = simulate_play_api_call(args.versionCode, args.package, args.window)
+        result = fetch_metrics(args.versionCode, args.package, args.window)
 
         # Write to output file
-        output_file = "tools/reports/PQG_play_metrics.json"
+        output_file = OUTPUT_FILE
         os.makedirs("tools/reports", exist_ok=True)
 
         with open(output_file, 'w') as f:
             json.dump(result, f, indent=2)
 
+        if args.history:
+            # metrics_history lives in tools/quality, which must be on PYTHONPATH
+            from metrics_history import record_history
+            record_history(args.history, args.versionCode, gate_metrics(result))
+
         print(f"✅ Play Vitals metrics fetched and saved to {output_file}")
         print(f"📊 Crash Rate: {result['metrics']['crash_rate']}%")
         print(f"📊 ANR Rate: {result['metrics']['anr_rate']}%")
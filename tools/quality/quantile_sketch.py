@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+"""
+Mergeable Quantile Sketch - P-QG-01
+
+KLL-style streaming quantile sketch for raw cold-start samples. Memory stays
+bounded (a few hundred retained values for k=200) however many samples are
+added, rank error is about 1.7/k, and sketches built on different shards or
+devices merge into one sketch of the combined stream. Sketches serialize to
+plain JSON so baselines can be stored per version code.
+"""
+
+import json
+import math
+import os
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_K = 200
+# Capacities shrink geometrically toward the lower levels, down to MIN_CAPACITY.
+CAPACITY_RATIO = 2.0 / 3.0
+MIN_CAPACITY = 8
+# Normalized rank error of a compacted sketch is about RANK_ERROR_FACTOR / k.
+RANK_ERROR_FACTOR = 1.7
+
+class KLLSketch:
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.compactors: List[List[float]] = [[]]
+        self._rng = random.Random(seed)
+        self._size = 0
+        self._resize()
+
+    def _resize(self) -> None:
+        """Recompute per-level capacities after the number of levels changed."""
+        height = len(self.compactors)
+        self._capacities = [
+            max(MIN_CAPACITY, int(math.ceil(self.k * CAPACITY_RATIO ** (height - level - 1))))
+            for level in range(height)
+        ]
+        self._max_size = sum(self._capacities)
+
+    def update(self, value: float) -> None:
+        value = float(value)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.n += 1
+        self.compactors[0].append(value)
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def extend(self, values: Iterable[float]) -> None:
+        """Add many values, filling level 0 in slices rather than one call per value."""
+        values = [float(v) for v in values]
+        if not values:
+            return
+        low, high = min(values), max(values)
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.n += len(values)
+        start = 0
+        while start < len(values):
+            room = max(1, self._max_size - self._size)
+            chunk = values[start:start + room]
+            self.compactors[0].extend(chunk)
+            self._size += len(chunk)
+            start += len(chunk)
+            if self._size >= self._max_size:
+                self._compress()
+
+    def _compress(self) -> None:
+        """Compact the lowest full level: keep every other sorted item at double weight."""
+        for level in range(len(self.compactors)):
+            items = self.compactors[level]
+            if len(items) < self._capacities[level]:
+                continue
+            if level + 1 == len(self.compactors):
+                self.compactors.append([])
+                self._resize()
+            items.sort()
+            # An odd leftover stays behind so total weight is preserved exactly
+            keep = [items.pop()] if len(items) % 2 else []
+            promoted = items[self._rng.getrandbits(1)::2]
+            self.compactors[level + 1].extend(promoted)
+            self.compactors[level] = keep
+            self._size -= len(items) - len(promoted)
+            if self._size < self._max_size:
+                break
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Fold another sketch into this one (in place) and return self."""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        for bound in (other.min, other.max):
+            if bound is not None:
+                self.min = bound if self.min is None else min(self.min, bound)
+                self.max = bound if self.max is None else max(self.max, bound)
+        self._size = sum(len(c) for c in self.compactors)
+        self._resize()
+        while self._size >= self._max_size:
+            self._compress()
+        return self
+
+    def weighted_items(self) -> List[Tuple[float, int]]:
+        """Retained (value, weight) pairs sorted by value; weights sum to n."""
+        pairs = [(value, 1 << level) for level, items in enumerate(self.compactors) for value in items]
+        pairs.sort()
+        return pairs
+
+    def rank_error(self) -> float:
+        """Normalized rank error of quantile queries; 0 while every sample is still retained."""
+        if len(self.compactors) == 1:
+            return 0.0
+        return RANK_ERROR_FACTOR / self.k
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        """Approximate quantiles for each q in [0, 1] (None for an empty sketch)."""
+        qs = list(qs)
+        if self.n == 0:
+            return [None] * len(qs)
+        pairs = self.weighted_items()
+        total = sum(weight for _, weight in pairs)
+        results = []
+        for q in qs:
+            if q <= 0:
+                results.append(self.min)
+                continue
+            if q >= 1:
+                results.append(self.max)
+                continue
+            target = q * total
+            cumulative = 0
+            for value, weight in pairs:
+                cumulative += weight
+                if cumulative >= target:
+                    results.append(value)
+                    break
+        return results
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles([q])[0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"k": self.k, "n": self.n, "min": self.min, "max": self.max, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'KLLSketch':
+        sketch = cls(data.get("k", DEFAULT_K))
+        sketch.n = data["n"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        sketch.compactors = [list(items) for items in data["compactors"]] or [[]]
+        sketch._size = sum(len(c) for c in sketch.compactors)
+        sketch._resize()
+        return sketch
+
+def sketch_path(sketch_dir: str, version_code: int) -> str:
+    return os.path.join(sketch_dir, f"{version_code}.json")
+
+def load_sketch(sketch_dir: str, version_code: int) -> Optional[KLLSketch]:
+    path = sketch_path(sketch_dir, version_code)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return KLLSketch.from_dict(json.load(f))
+
+def save_sketch(sketch_dir: str, version_code: int, sketch: KLLSketch) -> str:
+    os.makedirs(sketch_dir, exist_ok=True)
+    path = sketch_path(sketch_dir, version_code)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(sketch.to_dict(), f)
+    os.replace(tmp_path, path)
+    return path
+
+def stored_versions(sketch_dir: str) -> List[int]:
+    """Version codes that have a stored sketch, ascending."""
+    if not os.path.isdir(sketch_dir):
+        return []
+    versions = []
+    for name in os.listdir(sketch_dir):
+        stem, ext = os.path.splitext(name)
+        if ext == ".json" and stem.isdigit():
+            versions.append(int(stem))
+    return sorted(versions)
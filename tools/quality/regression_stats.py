@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+Startup Regression Statistics - P-QG-01
+
+Vectorized bootstrap confidence intervals and a Mann-Whitney test between a
+baseline and a candidate startup-time distribution. Both sides are given as
+quantile sketches (quantile_sketch.KLLSketch), whose retained values and
+weights stand in for the full sample, with each interval widened by the
+sketch's rank error. Bootstrap replicates are drawn straight from the exact
+bootstrap distribution of each quantile, so 10k resamples take milliseconds
+however many samples the sketches summarize.
+"""
+
+import math
+import sys
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from quantile_sketch import KLLSketch
+
+# Sample count above which a CI that fails to contain its point estimate is reported.
+LARGE_SAMPLE = 10000
+
+def sketch_arrays(sketch: KLLSketch) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted retained values and their weights."""
+    pairs = sketch.weighted_items()
+    values = np.array([value for value, _ in pairs], dtype=np.float64)
+    weights = np.array([weight for _, weight in pairs], dtype=np.float64)
+    return values, weights
+
+def _quantile_function(values: np.ndarray, weights: np.ndarray):
+    """Inverse CDF of the weighted sample, linear between the retained values.
+
+    Each retained value sits at the middle of the rank range its weight
+    covers, so ranks between two retained values interpolate instead of
+    snapping onto the sketch's grid of retained values.
+    """
+    total = weights.sum()
+    ranks = (np.cumsum(weights) - weights / 2.0) / total
+    return lambda u: np.interp(u, ranks, values)
+
+def _bootstrap_ranks(n: int, qs: np.ndarray, resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """(resamples, len(qs)) bootstrap replicates of the normalized rank of each quantile.
+
+    The q-quantile of an n-sample resample is the empirical inverse CDF at the
+    r-th order statistic of n uniforms (r = ceil(q * n)), which is
+    Beta(r, n - r + 1) distributed; drawing that Beta directly gives exact
+    bootstrap replicates without materializing any resample.
+    """
+    ranks = np.empty((resamples, len(qs)))
+    for j, q in enumerate(qs):
+        r = min(max(int(math.ceil(q * n)), 1), n)
+        ranks[:, j] = rng.beta(r, n - r + 1, size=resamples)
+    return ranks
+
+def _check_point_inside(name: str, low: float, point: float, high: float, n: int) -> None:
+    """Warn when a large-sample interval does not strictly contain its point estimate."""
+    if n >= LARGE_SAMPLE and not low < point < high:
+        print(f"WARNING: {name} regression {point:.2f}% lies outside its CI "
+              f"[{low:.2f}%, {high:.2f}%] (n={n})", file=sys.stderr)
+
+def bootstrap_regression(baseline: KLLSketch, candidate: KLLSketch, percentiles: Dict[str, float],
+                         resamples: int = 10000, confidence: float = 0.95, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """Percent change of each percentile (candidate vs baseline) with a bootstrap CI.
+
+    A compacted sketch only knows each rank to within its rank error, so every
+    replicate is evaluated with both ranks shifted by that error in the
+    direction that widens the interval: the low bound pairs a lower candidate
+    rank with a higher baseline rank, the high bound the opposite. Sketches
+    that still hold every sample have no rank error and are bootstrapped as
+    the raw sample.
+    """
+    rng = np.random.default_rng(seed)
+    qs = np.array(list(percentiles.values()))
+    base_quantile = _quantile_function(*sketch_arrays(baseline))
+    cand_quantile = _quantile_function(*sketch_arrays(candidate))
+    base_error, cand_error = baseline.rank_error(), candidate.rank_error()
+
+    base = _bootstrap_ranks(baseline.n, qs, resamples, rng)
+    cand = _bootstrap_ranks(candidate.n, qs, resamples, rng)
+
+    def change(cand_shift: float, base_shift: float) -> np.ndarray:
+        base_ms = base_quantile(np.clip(base + base_shift, 0.0, 1.0))
+        cand_ms = cand_quantile(np.clip(cand + cand_shift, 0.0, 1.0))
+        return (cand_ms - base_ms) / base_ms * 100.0
+
+    alpha = (1.0 - confidence) / 2.0
+    low = np.quantile(change(-cand_error, base_error), alpha, axis=0)
+    high = np.quantile(change(cand_error, -base_error), 1.0 - alpha, axis=0)
+    point_base = np.array(baseline.quantiles(qs))
+    point_cand = np.array(candidate.quantiles(qs))
+    point = (point_cand - point_base) / point_base * 100.0
+
+    for i, name in enumerate(percentiles):
+        _check_point_inside(name, low[i], point[i], high[i], min(baseline.n, candidate.n))
+
+    return {
+        name: {
+            "baseline_ms": round(float(point_base[i]), 1),
+            "current_ms": round(float(point_cand[i]), 1),
+            "regression_pct": round(float(point[i]), 2),
+            "ci_low_pct": round(float(low[i]), 2),
+            "ci_high_pct": round(float(high[i]), 2)
+        }
+        for i, name in enumerate(percentiles)
+    }
+
+def mann_whitney(baseline: KLLSketch, candidate: KLLSketch) -> Dict[str, Any]:
+    """Weighted Mann-Whitney U test that the candidate is slower than the baseline.
+
+    Reports the common-language effect size P(candidate > baseline) (ties
+    count half) and a one-sided normal-approximation p-value.
+    """
+    base_values, base_weights = sketch_arrays(baseline)
+    cand_values, cand_weights = sketch_arrays(candidate)
+    n1, n2 = base_weights.sum(), cand_weights.sum()
+
+    base_cum = np.concatenate(([0.0], np.cumsum(base_weights)))
+    below = base_cum[np.searchsorted(base_values, cand_values, side="left")]
+    at_or_below = base_cum[np.searchsorted(base_values, cand_values, side="right")]
+    u = float(np.sum(cand_weights * (below + 0.5 * (at_or_below - below))))
+
+    auc = u / (n1 * n2)
+    mean = n1 * n2 / 2.0
+    sd = math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12.0)
+    z = (u - mean) / sd if sd > 0 else 0.0
+    return {
+        "u": round(u, 1),
+        "prob_candidate_slower": round(float(auc), 4),
+        "z": round(float(z), 3),
+        "p_value_slower": float(0.5 * math.erfc(z / math.sqrt(2.0)))
+    }
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+
+"""
+Startup Phase Breakdown - P-QG-01
+
+Ingests per-phase startup timings printed by the app (NDJSON, as emitted by
+extract_flutter_json_report_prints.py) and compares each phase against the
+stored baseline of an older version code, so a failed cold-start gate points
+at the shim initialization that got slower.
+
+Each timing line looks like:
+  {"type": "startup_phase", "phase": "payments_shims", "duration_ms": 41.7, "run_id": "r1"}
+with an optional "stack" (list or ';'-joined) for nested phases. Phases are
+ordered and grouped by the shim wiring steps of
+tools/analysis/collect_foundation_gaps.analyze_shim_dependencies.
+"""
+
+import json
+import sys
+import argparse
+import os
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from quantile_sketch import KLLSketch
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "tools" / "analysis"))
+from collect_foundation_gaps import analyze_shim_dependencies  # noqa: E402
+
+DEFAULT_SKETCH_DIR = "tools/reports/PQG_startup_phase_sketches"
+ROOT_FRAME = "cold_start"
+
+class PhaseStats:
+    """Duration sketch plus total time and run count for one stack of phases."""
+
+    def __init__(self):
+        self.sketch = KLLSketch()
+        self.total_ms = 0.0
+        self.run_ids = set()
+        self.anonymous_runs = 0  # events without run_id each count as their own run
+
+    def add(self, duration_ms: float, run_id: Optional[str]) -> None:
+        self.sketch.update(duration_ms)
+        self.total_ms += duration_ms
+        if run_id is None:
+            self.anonymous_runs += 1
+        else:
+            self.run_ids.add(run_id)
+
+    def runs(self) -> int:
+        return len(self.run_ids) + self.anonymous_runs
+
+    def mean_per_run(self) -> float:
+        return self.total_ms / max(1, self.runs())
+
+    def merge(self, other: 'PhaseStats') -> None:
+        self.sketch.merge(other.sketch)
+        self.total_ms += other.total_ms
+        self.run_ids |= other.run_ids
+        self.anonymous_runs += other.anonymous_runs
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"sketch": self.sketch.to_dict(), "total_ms": self.total_ms, "runs": self.runs()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PhaseStats':
+        stats = cls()
+        stats.sketch = KLLSketch.from_dict(data["sketch"])
+        stats.total_ms = data["total_ms"]
+        # Run identities are not kept on disk, only their count
+        stats.anonymous_runs = data["runs"]
+        return stats
+
+def wiring_order(root_dir: str) -> List[Tuple[str, str]]:
+    """(phase, wiring step) pairs in initialization order."""
+    plan = analyze_shim_dependencies(root_dir)
+    return [(package, step["step"]) for step in plan["wiring_steps"] for package in step["packages"]]
+
+def read_phase_events(lines: Iterable[str], steps: Dict[str, str]) -> Dict[Tuple[str, ...], PhaseStats]:
+    """Aggregate startup_phase events by stack; unknown phases go under 'Other phases'."""
+    stacks: Dict[Tuple[str, ...], PhaseStats] = {}
+    for line in lines:
+        line = line.strip()
+        if not (line.startswith('{') and line.endswith('}')):
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if event.get("type") != "startup_phase" or not isinstance(event.get("duration_ms"), (int, float)):
+            continue
+
+        stack = event.get("stack")
+        if isinstance(stack, str):
+            stack = stack.split(';')
+        if not stack:
+            phase = event.get("phase", "unknown")
+            stack = [steps.get(phase, "Other phases"), phase]
+        key = (ROOT_FRAME, *stack)
+        stacks.setdefault(key, PhaseStats()).add(float(event["duration_ms"]), event.get("run_id"))
+    return stacks
+
+def load_baseline(sketch_dir: str, version_code: int) -> Tuple[Optional[int], Dict[Tuple[str, ...], PhaseStats]]:
+    """Stored phase stats of the newest older version code, if any."""
+    if not os.path.isdir(sketch_dir):
+        return None, {}
+    older = sorted(int(name[:-5]) for name in os.listdir(sketch_dir)
+                   if name.endswith(".json") and name[:-5].isdigit() and int(name[:-5]) < version_code)
+    if not older:
+        return None, {}
+    with open(os.path.join(sketch_dir, f"{older[-1]}.json"), 'r') as f:
+        data = json.load(f)
+    return older[-1], {tuple(key.split(';')): PhaseStats.from_dict(value) for key, value in data.items()}
+
+def save_phase_stats(sketch_dir: str, version_code: int, stacks: Dict[Tuple[str, ...], PhaseStats]) -> str:
+    path = os.path.join(sketch_dir, f"{version_code}.json")
+    merged = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            merged = {tuple(k.split(';')): PhaseStats.from_dict(v) for k, v in json.load(f).items()}
+    for key, stats in stacks.items():
+        if key in merged:
+            merged[key].merge(stats)
+        else:
+            merged[key] = stats
+    os.makedirs(sketch_dir, exist_ok=True)
+    with open(path + ".tmp", 'w') as f:
+        json.dump({';'.join(key): stats.to_dict() for key, stats in merged.items()}, f)
+    os.replace(path + ".tmp", path)
+    return path
+
+def phase_table(current: Dict[Tuple[str, ...], PhaseStats], baseline: Dict[Tuple[str, ...], PhaseStats],
+                order: List[Tuple[str, str]], threshold: float) -> List[Dict[str, Any]]:
+    """One row per stack in wiring order with p50/p90 and mean-per-run deltas."""
+    rank = {phase: i for i, (phase, _) in enumerate(order)}
+    keys = sorted(set(current) | set(baseline), key=lambda k: (rank.get(k[-1], len(rank)), k))
+    rows = []
+    total_delta = sum(current[k].mean_per_run() if k in current else 0.0 for k in keys) - \
+        sum(baseline[k].mean_per_run() if k in baseline else 0.0 for k in keys)
+
+    for key in keys:
+        cur, base = current.get(key), baseline.get(key)
+        row = {"phase": key[-1], "stack": ';'.join(key), "step": key[-2] if len(key) > 2 else None}
+        cur_p50, cur_p90 = cur.sketch.quantiles([0.5, 0.9]) if cur else (None, None)
+        base_p50, base_p90 = base.sketch.quantiles([0.5, 0.9]) if base else (None, None)
+        cur_mean = cur.mean_per_run() if cur else 0.0
+        base_mean = base.mean_per_run() if base else 0.0
+        row.update({
+            "current_p50_ms": round(cur_p50, 1) if cur_p50 is not None else None,
+            "current_p90_ms": round(cur_p90, 1) if cur_p90 is not None else None,
+            "baseline_p50_ms": round(base_p50, 1) if base_p50 is not None else None,
+            "baseline_p90_ms": round(base_p90, 1) if base_p90 is not None else None,
+            "mean_delta_ms": round(cur_mean - base_mean, 1),
+            "share_of_total_delta_pct": round((cur_mean - base_mean) / total_delta * 100, 1) if total_delta else None
+        })
+        if cur_p90 is not None and base_p90:
+            row["p90_regression_pct"] = round((cur_p90 - base_p90) / base_p90 * 100, 2)
+            row["regressed"] = row["p90_regression_pct"] > threshold
+        else:
+            row["p90_regression_pct"] = None
+            row["regressed"] = False
+        rows.append(row)
+    return rows
+
+def folded_stacks(current: Dict[Tuple[str, ...], PhaseStats],
+                  baseline: Optional[Dict[Tuple[str, ...], PhaseStats]] = None) -> List[str]:
+    """Folded-stack lines (mean microseconds per run) for flamegraph.pl / speedscope.
+
+    With a baseline, lines carry baseline and current counts
+    ("stack before after"), the input format of differential flame graphs.
+    """
+    lines = []
+    for key in sorted(set(current) | set(baseline or {})):
+        cur = int(round(current[key].mean_per_run() * 1000)) if key in current else 0
+        if baseline is None:
+            lines.append(f"{';'.join(key)} {cur}")
+        else:
+            base = int(round(baseline[key].mean_per_run() * 1000)) if key in baseline else 0
+            lines.append(f"{';'.join(key)} {base} {cur}")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-phase startup regression breakdown")
+    parser.add_argument("--versionCode", type=int, required=True, help="Current app version code")
+    parser.add_argument("--in", dest="input", type=str, default="-",
+                        help="NDJSON from extract_flutter_json_report_prints.py (default: stdin)")
+    parser.add_argument("--sketch-dir", type=str, default=DEFAULT_SKETCH_DIR,
+                        help=f"Per-version phase sketches used as baselines (default: {DEFAULT_SKETCH_DIR})")
+    parser.add_argument("--record-baseline", action="store_true",
+                        help="Merge this run's phase timings into the stored sketches for --versionCode")
+    parser.add_argument("--gates", type=str, default="tools/quality/quality_gates.json",
+                        help="Quality gates config providing cold_start_regression_pct_max")
+
+    args = parser.parse_args()
+
+    try:
+        with open(args.gates, 'r') as f:
+            threshold = float(json.load(f)["thresholds"]["cold_start_regression_pct_max"])
+
+        order = wiring_order(str(ROOT))
+        steps = dict(order)
+        if args.input == "-":
+            current = read_phase_events(sys.stdin, steps)
+        else:
+            with open(args.input, 'r') as f:
+                current = read_phase_events(f, steps)
+        if not current:
+            print("ERROR: No startup_phase events found", file=sys.stderr)
+            sys.exit(1)
+
+        baseline_version, baseline = load_baseline(args.sketch_dir, args.versionCode)
+        rows = phase_table(current, baseline, order, threshold)
+        regressed = sorted((r for r in rows if r["regressed"]), key=lambda r: r["mean_delta_ms"], reverse=True)
+
+        os.makedirs("tools/reports", exist_ok=True)
+        result = {
+            "current_version": args.versionCode,
+            "baseline_version": baseline_version,
+            "threshold_pct": threshold,
+            "phases": rows,
+            "regressed_phases": [r["phase"] for r in regressed],
+            "top_regressed_phase": regressed[0]["phase"] if regressed else None
+        }
+        with open("tools/reports/PQG_startup_phases.json", 'w') as f:
+            json.dump(result, f, indent=2)
+
+        with open("tools/reports/PQG_startup_phases.folded", 'w') as f:
+            f.write("\n".join(folded_stacks(current)) + "\n")
+        if baseline:
+            with open("tools/reports/PQG_startup_phases.diff.folded", 'w') as f:
+                f.write("\n".join(folded_stacks(current, baseline)) + "\n")
+
+        summary_lines = [
+            "# Startup Phase Breakdown - P-QG-01\n",
+            f"**Version Code:** {args.versionCode} (baseline: {baseline_version or 'none'})\n",
+            "| Step | Phase | Baseline P90 | Current P90 | P90 Δ | Mean Δ/run | Share of Δ | Status |",
+            "|------|-------|--------------|-------------|-------|------------|------------|--------|",
+        ]
+        for r in rows:
+            delta = f"{r['p90_regression_pct']}%" if r['p90_regression_pct'] is not None else "N/A"
+            share = f"{r['share_of_total_delta_pct']}%" if r['share_of_total_delta_pct'] is not None else "N/A"
+            summary_lines.append(
+                f"| {r['step'] or ''} | {r['phase']} | {r['baseline_p90_ms'] or 'N/A'} | {r['current_p90_ms'] or 'N/A'} | "
+                f"{delta} | {r['mean_delta_ms']}ms | {share} | {'❌' if r['regressed'] else '✅'} |"
+            )
+        with open("tools/reports/PQG_startup_phases.md", 'w') as f:
+            f.write("\n".join(summary_lines) + "\n")
+
+        if args.record_baseline:
+            path = save_phase_stats(args.sketch_dir, args.versionCode, current)
+            print(f"📦 Phase sketches for {args.versionCode} saved to {path}")
+
+        print("✅ Startup phase breakdown saved to tools/reports/PQG_startup_phases.json")
+        if regressed:
+            print(f"📊 Regressed phases: {', '.join(result['regressed_phases'])}")
+            print(f"📊 Largest slowdown: {regressed[0]['phase']} (+{regressed[0]['mean_delta_ms']}ms/run)")
+
+    except Exception as e:
+        print(f"ERROR: Failed to compute startup phase breakdown: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()